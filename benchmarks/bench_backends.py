@@ -0,0 +1,98 @@
+"""
+Compare Whisper inference backends on the same audio: real-time factor,
+peak memory and word error rate against the fp32 `whisper` backend.
+Each backend runs in its own subprocess so peak RSS is measured in isolation.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_backends path/to/audio.wav --model base
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref, hyp = reference.split(), hypothesis.split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def run_child(backend, audio_file, model_size, language):
+    from scripts.backends import load_backend
+    from scripts.transcribe import load_audio_array, SAMPLE_RATE
+
+    audio = load_audio_array(audio_file)
+    start = time.perf_counter()
+    model = load_backend(backend, model_size, "cpu")
+    load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = model.transcribe(audio, language=language)
+    transcribe_s = time.perf_counter() - start
+
+    audio_s = len(audio) / SAMPLE_RATE
+    print(json.dumps({
+        "backend": backend,
+        "load_seconds": load_s,
+        "transcribe_seconds": transcribe_s,
+        "rtf": transcribe_s / audio_s,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "text": result["text"],
+    }, ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio_file")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--language", default="hi")
+    parser.add_argument("--backends", nargs="+", default=None)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.audio_file, args.model, args.language)
+        return
+
+    from scripts.backends import available_backends, DEFAULT_BACKEND
+
+    backends = args.backends or available_backends()
+    if DEFAULT_BACKEND in backends:
+        # The fp32 baseline runs first so the others can be scored against it
+        backends.remove(DEFAULT_BACKEND)
+    backends.insert(0, DEFAULT_BACKEND)
+
+    results = []
+    for backend in backends:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_backends", args.audio_file,
+             "--model", args.model, "--language", args.language, "--child", backend],
+            stdout=subprocess.PIPE, text=True
+        )
+        if out.returncode != 0:
+            results.append({"backend": backend, "error": f"exit code {out.returncode}"})
+            continue
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    baseline = results[0].get("text", "")
+    for result in results:
+        if "text" in result:
+            result["wer_vs_fp32"] = word_error_rate(baseline, result.pop("text"))
+
+    print(json.dumps({"model": args.model, "results": results}, indent=4, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
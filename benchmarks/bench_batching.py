@@ -0,0 +1,66 @@
+"""
+Measure throughput of batched multi-file decoding at several concurrency
+levels. Each level runs that many concurrent jobs, each transcribing its own
+copy of the fixture, once unbatched (each job calls the model directly) and
+once through the BatchScheduler. Throughput is reported as audio-hours
+decoded per wall-clock hour.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_batching --model tiny --concurrency 1 4 8
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fixtures import make_fixtures, SAMPLE_RATE
+
+
+def run(concurrency, work):
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        list(pool.map(lambda _: work(), range(concurrency)))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--seconds", type=int, default=60, help="Fixture length per job")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--max-wait-ms", type=float, default=50)
+    parser.add_argument("--fixtures", default="benchmarks/fixtures_audio")
+    args = parser.parse_args()
+
+    from scripts.backends import load_backend
+    from scripts.batching import BatchScheduler
+    from scripts.transcribe import load_audio_array
+
+    backend = load_backend("whisper", args.model, "cpu")
+    audio = load_audio_array(make_fixtures(args.fixtures, [args.seconds])[args.seconds])
+    audio_hours = len(audio) / SAMPLE_RATE / 3600
+
+    # The unbatched model is not thread-safe, so direct calls are serialized like separate jobs would be
+    model_lock = threading.Lock()
+
+    def unbatched():
+        with model_lock:
+            backend.transcribe(audio, language="hi")
+
+    results = []
+    for concurrency in args.concurrency:
+        scheduler = BatchScheduler(backend, max_batch_size=concurrency, max_wait_s=args.max_wait_ms / 1000)
+        for mode, work in (("unbatched", unbatched), ("batched", lambda: scheduler.transcribe(audio))):
+            elapsed = run(concurrency, work)
+            results.append({
+                "mode": mode, "concurrency": concurrency, "seconds": elapsed,
+                "audio_hours_per_hour": concurrency * audio_hours * 3600 / elapsed,
+            })
+            print(f"{mode:>9} x{concurrency}: {elapsed:.1f}s")
+
+    print(json.dumps({"model": args.model, "seconds_per_job": args.seconds, "results": results}, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Captions-first path versus Whisper on the local caption fixtures.
+
+For every file in benchmarks/fixtures_captions (named <name>.<lang>.<vtt|srv3>)
+this parses the cues, scores them with the confidence heuristic, and times
+parsing plus normalization, which is all the captions path does before
+summarizing. It prints which fixtures would be used and which would fall back
+to ASR. With --asr, Whisper also transcribes fixture audio of the same length
+so the two job times can be compared.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_captions
+    python -m benchmarks.bench_captions --asr --model base
+"""
+import os
+import glob
+import json
+import time
+import argparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures_captions")
+# Length of the speech in the fixtures, used for coverage and for the ASR comparison
+FIXTURE_DURATION_S = 20
+
+
+def caption_path(path):
+    from scripts.captions import parse_captions, speech_segments, caption_confidence, CAPTION_MIN_CONFIDENCE
+    from scripts.postprocess import clean_transcript
+
+    language, ext = path.rsplit(".", 2)[-2:]
+    kind = "auto" if os.path.basename(path).startswith("auto") else "manual"
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+
+    start = time.perf_counter()
+    segments = speech_segments(parse_captions(text, ext))
+    confidence = caption_confidence(segments, language, kind, FIXTURE_DURATION_S)
+    transcript = clean_transcript((segment["text"] for segment in segments), lang=language)
+    elapsed = time.perf_counter() - start
+    return {
+        "file": os.path.basename(path),
+        "cues": len(segments),
+        "confidence": confidence,
+        "used": confidence >= CAPTION_MIN_CONFIDENCE,
+        "seconds": round(elapsed, 5),
+        "transcript": transcript[:80],
+    }
+
+
+def asr_path(model_size):
+    import tempfile
+    from benchmarks.fixtures import make_fixtures
+    from scripts.transcribe import HindiTranscriber
+
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_path = make_fixtures(tmp, [FIXTURE_DURATION_S])[FIXTURE_DURATION_S]
+        transcriber = HindiTranscriber(model_size=model_size, language="hi")
+        start = time.perf_counter()
+        transcriber.transcribe_audio(os.path.join(tmp, "out"), audio_path)
+        return {"model": model_size, "seconds": round(time.perf_counter() - start, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--asr", action="store_true", help="Also time Whisper on audio of the same length")
+    parser.add_argument("--model", default="base")
+    args = parser.parse_args()
+
+    from scripts.postprocess import get_normalizer
+    get_normalizer("hi")  # load resources outside the timed region, as a running worker would have
+
+    results = {"captions": [caption_path(path) for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.*.*")))]}
+    if args.asr:
+        results["asr"] = asr_path(args.model)
+    print(json.dumps(results, indent=4, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
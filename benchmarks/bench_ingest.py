@@ -0,0 +1,66 @@
+"""
+Measure the CPU time spent getting audio into Whisper for the two ingest paths:
+
+    mp3: source -> 192 kbps MP3 (ffmpeg) -> float PCM (ffmpeg again, inside Whisper)
+    wav: source -> 16 kHz mono PCM WAV (ffmpeg) -> memory-mapped, no second decode
+
+Results are scaled to CPU seconds per hour of audio.
+
+Usage:
+    python -m benchmarks.bench_ingest path/to/source.webm
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import tempfile
+import time
+
+from scripts.transcribe import load_audio_array, SAMPLE_RATE
+
+
+def cpu_seconds():
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    child_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return (self_usage.ru_utime + self_usage.ru_stime
+            + child_usage.ru_utime + child_usage.ru_stime)
+
+
+def run_path(source, fmt, workdir):
+    out = os.path.join(workdir, f"audio.{fmt}")
+    if fmt == "mp3":
+        args = ["-vn", "-codec:a", "libmp3lame", "-b:a", "192k"]
+    else:
+        args = ["-vn", "-ar", str(SAMPLE_RATE), "-ac", "1", "-c:a", "pcm_s16le"]
+
+    cpu_start, wall_start = cpu_seconds(), time.perf_counter()
+    subprocess.run(["ffmpeg", "-nostdin", "-y", "-loglevel", "error", "-i", source, *args, out], check=True)
+    audio = load_audio_array(out)
+    float(audio.sum())  # touch every sample so memory-mapped input is really read
+    return cpu_seconds() - cpu_start, time.perf_counter() - wall_start, len(audio) / SAMPLE_RATE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source")
+    args = parser.parse_args()
+
+    results = {"source": args.source, "runs": []}
+    with tempfile.TemporaryDirectory() as workdir:
+        for fmt in ("mp3", "wav"):
+            cpu, wall, audio_s = run_path(args.source, fmt, workdir)
+            results["runs"].append({
+                "format": fmt, "cpu_seconds": cpu, "wall_seconds": wall,
+                "audio_seconds": audio_s, "cpu_seconds_per_audio_hour": cpu * 3600 / audio_s
+            })
+
+    mp3, wav = results["runs"]
+    results["cpu_seconds_saved_per_audio_hour"] = (
+        mp3["cpu_seconds_per_audio_hour"] - wav["cpu_seconds_per_audio_hour"]
+    )
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
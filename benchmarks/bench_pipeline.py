@@ -0,0 +1,125 @@
+"""
+End-to-end pipeline benchmark on local fixture audio.
+
+Fixtures are served by a local HTTP server standing in for YouTube, then each
+one goes through download_audio, HindiTranscriber (tiny model on CPU by
+default), summarization and save_transcript_and_summary. Wall time,
+real-time factor, peak RSS and model-load time are recorded per stage and
+written as JSON named after the current commit, so runs can be compared.
+
+Usage:
+    python -m benchmarks.bench_pipeline --lengths 10 30 60 --out benchmarks/results
+"""
+import argparse
+import functools
+import http.server
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.fixtures import make_fixtures, SAMPLE_RATE
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, text=True).stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def serve_directory(directory):
+    """Start a quiet local HTTP server for `directory`; returns (server, base_url)."""
+    class QuietHandler(http.server.SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def timed(stages, name, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    stages[name] = {"seconds": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb()}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 30, 60])
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--fixtures", default="benchmarks/fixtures_audio")
+    parser.add_argument("--out", default="benchmarks/results")
+    args = parser.parse_args()
+
+    # Keep the run on CPU and away from earlier results
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    os.environ["RESULT_CACHE"] = "0"
+    # Read when the modules below are imported or first used: stored bench_* transcripts
+    # and metrics snapshots stay in the run's work dir, out of the user's search index
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    os.environ["TRANSCRIPT_DB_PATH"] = os.path.join(workdir, "transcripts.sqlite3")
+    os.environ["METRICS_DIR"] = os.path.join(workdir, "metrics")
+
+    from scripts.download_audio import download_audio
+    from scripts.transcribe import HindiTranscriber, load_audio_array
+    from scripts.save_json import save_transcript_and_summary
+
+    fixtures = make_fixtures(args.fixtures, args.lengths)
+    server, base_url = serve_directory(os.path.abspath(args.fixtures))
+
+    report = {"commit": git_commit(), "model": args.model, "python": sys.version.split()[0], "runs": []}
+
+    try:
+        start = time.perf_counter()
+        transcriber = HindiTranscriber(model_size=args.model, device="cpu")
+        report["model_load_seconds"] = time.perf_counter() - start
+        report["model_load_peak_rss_mb"] = peak_rss_mb()
+
+        for seconds, path in sorted(fixtures.items()):
+            stages = {}
+            url = f"{base_url}/{os.path.basename(path)}"
+            audio_path = timed(stages, "download", download_audio, url, f"bench_{seconds}s",
+                               output_folder=os.path.join(workdir, "raw_audio"), audio_format="wav")
+            audio = timed(stages, "decode", load_audio_array, audio_path)
+            result = timed(stages, "transcribe", transcriber.model.transcribe, audio, language="hi")
+            summary = timed(stages, "summarize", transcriber.summarize, result["text"])
+            timed(stages, "save", save_transcript_and_summary, f"bench_{seconds}s", result["text"], summary,
+                  output_folder=os.path.join(workdir, "json_files"))
+
+            audio_s = len(audio) / SAMPLE_RATE
+            total = sum(stage["seconds"] for stage in stages.values())
+            report["runs"].append({
+                "audio_seconds": audio_s,
+                "wall_seconds": total,
+                "rtf": total / audio_s,
+                "transcribe_rtf": stages["transcribe"]["seconds"] / audio_s,
+                "stages": stages,
+            })
+            print(f"✅ {seconds}s fixture: {total:.1f}s wall, RTF {total / audio_s:.2f}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(args.out, exist_ok=True)
+    out_path = os.path.join(args.out, f"pipeline_{report['commit']}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    print(f"Results written to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
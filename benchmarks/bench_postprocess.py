@@ -0,0 +1,62 @@
+"""
+Micro-benchmark for transcript post-processing on a 100k-word transcript.
+
+Compares the previous approach (a new DevanagariNormalizer per call, applied
+to the whole transcript string) with scripts.postprocess, which reuses one
+normalizer and cleans segment by segment. Peak Python memory is measured
+with tracemalloc.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_postprocess --words 100000
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+WORDS = "नमस्ते आज हम भारत के इतिहास बारे में बात करेंगे यह एक लंबी कहानी है जिसमें कई राजा और साम्राज्य शामिल हैं".split()
+
+
+def make_segments(n_words, words_per_segment=12, seed=0):
+    rng = random.Random(seed)
+    for _ in range(n_words // words_per_segment):
+        yield " ".join(rng.choice(WORDS) for _ in range(words_per_segment))
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": elapsed, "peak_mb": peak / 1024 / 1024, "output_chars": len(result)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=100000)
+    args = parser.parse_args()
+
+    from indicnlp.normalize.indic_normalize import DevanagariNormalizer
+    from scripts.postprocess import clean_transcript, get_normalizer
+
+    get_normalizer("hi")  # load resources outside the timed region, as a running worker would have
+
+    def whole_string():
+        text = " ".join(make_segments(args.words))
+        return DevanagariNormalizer().normalize(text)
+
+    def per_segment():
+        return clean_transcript(make_segments(args.words), lang="hi")
+
+    print(json.dumps({
+        "words": args.words,
+        "whole_string": measure(whole_string),
+        "per_segment": measure(per_segment),
+    }, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Compare wall-clock time of the single-call Whisper path against segmented,
+parallel transcription on the same audio file.
+
+Usage:
+    python -m benchmarks.bench_segmented path/to/audio.mp3 --model tiny --workers 1 2 4
+"""
+import argparse
+import json
+import time
+
+import whisper
+
+from scripts.transcribe import transcribe_segmented
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio_file")
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--target-s", type=float, default=60)
+    args = parser.parse_args()
+
+    audio_s = len(whisper.load_audio(args.audio_file)) / 16000
+    results = {"audio_seconds": audio_s, "model": args.model, "runs": []}
+
+    model = whisper.load_model(args.model, device=args.device)
+    start = time.perf_counter()
+    model.transcribe(args.audio_file, language="hi")
+    baseline = time.perf_counter() - start
+    results["runs"].append({"mode": "single", "workers": 1, "seconds": baseline, "rtf": baseline / audio_s})
+
+    for workers in args.workers:
+        start = time.perf_counter()
+        transcribe_segmented(
+            args.audio_file, model_size=args.model, device=args.device,
+            workers=workers, target_s=args.target_s, model=model
+        )
+        elapsed = time.perf_counter() - start
+        results["runs"].append({
+            "mode": "segmented", "workers": workers, "seconds": elapsed,
+            "rtf": elapsed / audio_s, "speedup": baseline / elapsed
+        })
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Speculative summarization versus summarizing after transcription.
+
+Sequential: transcribe the fixture, then summarize the transcript; both
+stages are timed. Speculative: process_audio with the StreamingSummarizer, so
+finished windows are summarized while Whisper keeps decoding. With full
+overlap the speculative job takes about max(ASR, summary) instead of their
+sum; "overlap" is the share of the shorter stage that was hidden.
+
+Short checkpoint windows and chunks make the summarizer start early on the
+fixture; both are flags. Synthetic fixtures give a meaningless transcript,
+which is still summarized like a real one.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_speculative --model base --length 600
+    python -m benchmarks.bench_speculative --model tiny --length 300 --window-s 30 --chunk-tokens 256
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--length", type=int, default=600, help="Fixture length in seconds")
+    parser.add_argument("--window-s", type=int, default=30, help="CHECKPOINT_WINDOW_S: audio per fed window")
+    parser.add_argument("--chunk-tokens", type=int, default=256)
+    parser.add_argument("--fixtures", default="benchmarks/fixtures_audio")
+    args = parser.parse_args()
+
+    # Read at import time by scripts.transcribe; every run must do the full work
+    os.environ["CHECKPOINT_WINDOW_S"] = str(args.window_s)
+    os.environ["RESULT_CACHE"] = "0"
+
+    from benchmarks.fixtures import make_fixtures
+    from scripts.checkpoint import PipelineCheckpoint
+    from scripts.transcribe import HindiTranscriber
+
+    audio_path = make_fixtures(args.fixtures, [args.length])[args.length]
+    results = {"model": args.model, "length_s": args.length, "window_s": args.window_s,
+               "chunk_tokens": args.chunk_tokens}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        def checkpoint(name):
+            return PipelineCheckpoint(name, transcript_dir=workdir, summary_dir=workdir, state_dir=workdir)
+
+        with HindiTranscriber(model_size=args.model, device="cpu", language="hi",
+                              summary_chunk_tokens=args.chunk_tokens, summarize_in_subprocess=False) as transcriber:
+            # Warm-up so neither run pays for first-call initialization
+            transcriber.transcribe_audio(workdir, audio_path, checkpoint=checkpoint("warmup"))
+
+            start = time.perf_counter()
+            transcript = transcriber.transcribe_audio(workdir, audio_path, checkpoint=checkpoint("sequential"))
+            asr_s = time.perf_counter() - start
+            start = time.perf_counter()
+            summary = transcriber.summarize(transcript)
+            summary_s = time.perf_counter() - start
+
+            transcriber.speculative_summary = True
+            start = time.perf_counter()
+            _, speculative_summary = transcriber.process_audio(
+                workdir, audio_path, checkpoint=checkpoint("speculative")
+            )
+            speculative_s = time.perf_counter() - start
+
+    sequential_s = asr_s + summary_s
+    hidden_s = min(asr_s, summary_s)
+    results.update({
+        "transcript_chars": len(transcript),
+        "asr_s": round(asr_s, 2),
+        "summary_s": round(summary_s, 2),
+        "sequential_s": round(sequential_s, 2),
+        "speculative_s": round(speculative_s, 2),
+        "ideal_s": round(max(asr_s, summary_s), 2),
+        "overlap": round((sequential_s - speculative_s) / hidden_s, 2) if hidden_s else None,
+        "summary": summary[:120],
+        "speculative_summary": speculative_summary[:120],
+    })
+    print(json.dumps(results, indent=4, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Measure Flask app startup: import cost (from `python -X importtime`) and the
+time from interpreter start to the first GET / response. Exits non-zero when
+the first GET takes longer than --target seconds.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_startup --target 1.5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+FLASK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "flask_app")
+
+FIRST_GET = (
+    "import time; start = time.perf_counter(); "
+    "from app import app; imported = time.perf_counter(); "
+    "resp = app.test_client().get('/'); assert resp.status_code == 200; "
+    "print(imported - start, time.perf_counter() - start)"
+)
+
+
+def python_env():
+    env = dict(os.environ)
+    root = os.path.dirname(FLASK_DIR)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    return env
+
+
+def import_profile(top):
+    """Return the `top` slowest imports by cumulative time (microseconds)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=FLASK_DIR,
+                            env=python_env(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    rows.sort(reverse=True)
+    return [{"module": name, "cumulative_us": cum, "self_us": own} for cum, own, name in rows[:top]]
+
+
+def first_get(runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", FIRST_GET], cwd=FLASK_DIR, env=python_env(),
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True)
+        wall = time.perf_counter() - start
+        import_s, get_s = map(float, out.stdout.split()[-2:])
+        samples.append({"process_wall_s": wall, "import_s": import_s, "first_get_s": get_s})
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--target", type=float, default=1.5, help="Target seconds to serve the first GET")
+    args = parser.parse_args()
+
+    samples = first_get(args.runs)
+    best = min(sample["process_wall_s"] for sample in samples)
+    report = {
+        "target_s": args.target,
+        "best_process_wall_s": best,
+        "runs": samples,
+        "slowest_imports": import_profile(args.top),
+    }
+    print(json.dumps(report, indent=4))
+
+    if best > args.target:
+        print(f"❌ First GET took {best:.2f}s, target is {args.target:.2f}s")
+        return 1
+    print(f"✅ First GET in {best:.2f}s (target {args.target:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Compare the single-call summarizer (which truncates long input) against
+hierarchical map-reduce summarization, reporting throughput in tokens/s.
+
+Usage:
+    python -m benchmarks.bench_summarize transcript.txt --batch-size 1 4 8
+"""
+import argparse
+import json
+import time
+
+from transformers import pipeline
+
+from scripts.summarize import summarize_long
+from scripts.transcribe import DEFAULT_SUMMARIZER
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("text_file")
+    parser.add_argument("--model", default=DEFAULT_SUMMARIZER)
+    parser.add_argument("--chunk-tokens", type=int, default=None)
+    parser.add_argument("--overlap-tokens", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    with open(args.text_file, encoding="utf-8") as f:
+        text = f.read()
+
+    summarizer = pipeline("summarization", model=args.model, tokenizer=args.model, device=-1)
+    n_tokens = len(summarizer.tokenizer(text, add_special_tokens=False)["input_ids"])
+    results = {"input_tokens": n_tokens, "runs": []}
+
+    start = time.perf_counter()
+    summarizer(text, max_length=100, min_length=30, do_sample=False, truncation=True)
+    elapsed = time.perf_counter() - start
+    covered = min(n_tokens, summarizer.tokenizer.model_max_length)
+    results["runs"].append({
+        "mode": "single", "seconds": elapsed, "tokens_covered": covered,
+        "tokens_per_s": covered / elapsed
+    })
+
+    for batch_size in args.batch_size:
+        start = time.perf_counter()
+        summarize_long(
+            summarizer, text, chunk_tokens=args.chunk_tokens,
+            overlap_tokens=args.overlap_tokens, batch_size=batch_size
+        )
+        elapsed = time.perf_counter() - start
+        results["runs"].append({
+            "mode": "map_reduce", "batch_size": batch_size, "seconds": elapsed,
+            "tokens_covered": n_tokens, "tokens_per_s": n_tokens / elapsed
+        })
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
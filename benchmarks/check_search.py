@@ -0,0 +1,64 @@
+"""
+Check that transcript search matches whole Hindi words, vowel signs included.
+
+Stores a few transcripts in a temporary TranscriptStore and runs queries that
+only differ from indexed words in their matras ("का" vs "के", "मैं" vs "में",
+"करेंगी" vs "करेंगे"). Exits with code 1 if any query matches the wrong
+records or a snippet cuts a word apart.
+
+Usage (from the repo root):
+    python -m benchmarks.check_search
+"""
+import os
+import sys
+import tempfile
+
+TRANSCRIPTS = {
+    "history": "भारत के इतिहास में सभ्यता का विकास",
+    "market": "हम बाजार जा रहे थे और मैं थक गया",
+    "future": "वे कल काम करेंगी",
+}
+# query -> titles it must match, and nothing else
+EXPECTED = {
+    "के": {"history"},
+    "का": {"history"},
+    "की": set(),
+    "में": {"history"},
+    "मैं": {"market"},
+    "करेंगी": {"future"},
+    "करेंगे": set(),
+    "सभ्यता": {"history"},
+    "सभ": set(),
+}
+
+
+def main():
+    from scripts.store import TranscriptStore
+
+    failures = []
+    with tempfile.TemporaryDirectory() as workdir:
+        store = TranscriptStore(os.path.join(workdir, "transcripts.sqlite3"))
+        for title, transcript in TRANSCRIPTS.items():
+            store.add(title, transcript, "")
+
+        for query, expected in EXPECTED.items():
+            hits = store.search(query)
+            titles = {hit["title"] for hit in hits}
+            status = "ok" if titles == expected else "FAIL"
+            print(f"{status:>4}  {query}: {sorted(titles)}")
+            if titles != expected:
+                failures.append(query)
+            for hit in hits:
+                if f"[{query}]" not in hit["snippet"]:
+                    print(f"FAIL  {query}: snippet {hit['snippet']}")
+                    failures.append(query)
+
+    if failures:
+        print(f"❌ Search mismatches for: {', '.join(sorted(set(failures)))}")
+        return 1
+    print("✅ Search keeps Devanagari words whole")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
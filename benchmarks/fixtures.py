@@ -0,0 +1,68 @@
+"""
+Fixture audio for the benchmarks.
+
+If `espeak-ng` is installed, fixtures are spoken Hindi sentences; otherwise a
+speech-like signal is synthesized (voiced harmonics with syllable-rate
+amplitude modulation and short pauses), which exercises decoding, VAD and
+chunking the same way even though the transcript is meaningless.
+"""
+import os
+import shutil
+import subprocess
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+HINDI_TEXT = (
+    "नमस्ते, आज हम भारत के इतिहास के बारे में बात करेंगे। "
+    "यह एक लंबी कहानी है जिसमें कई राजा और साम्राज्य शामिल हैं। "
+    "हम देखेंगे कि समय के साथ समाज और संस्कृति कैसे बदली। "
+)
+
+
+def write_wav(path, audio):
+    pcm = (np.clip(audio, -1, 1) * 32767).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(pcm.tobytes())
+
+
+def synthesize_speech_like(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    syllables = 0.5 * (1 + np.sin(2 * np.pi * 4 * t))
+    # Half-second pauses every few seconds give the VAD something to cut on
+    pauses = (t % 4.0) < 3.5
+    audio = 0.3 * voiced * syllables * pauses + 0.005 * rng.standard_normal(len(t))
+    return audio.astype(np.float32)
+
+
+def _espeak(path, seconds):
+    repeats = max(1, int(seconds // 10) + 1)
+    raw = path + ".raw.wav"
+    subprocess.run(["espeak-ng", "-v", "hi", "-w", raw, HINDI_TEXT * repeats], check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    subprocess.run(["ffmpeg", "-nostdin", "-y", "-loglevel", "error", "-i", raw, "-t", str(seconds),
+                    "-ar", str(SAMPLE_RATE), "-ac", "1", path], check=True)
+    os.remove(raw)
+
+
+def make_fixtures(directory, lengths=(10, 30, 60)):
+    """Create (or reuse) one fixture per length in seconds; returns {length: path}."""
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for seconds in lengths:
+        path = os.path.join(directory, f"fixture_{seconds}s.wav")
+        if not os.path.exists(path):
+            if shutil.which("espeak-ng") and shutil.which("ffmpeg"):
+                _espeak(path, seconds)
+            else:
+                write_wav(path, synthesize_speech_like(seconds, seed=seconds))
+        paths[seconds] = path
+    return paths
@@ -0,0 +1,108 @@
+"""
+Check job planning across simulated resource envelopes without touching the
+hardware. Every combination of envelope, audio length and concurrency, plus a
+few cases for latency budgets, loaded models and overrides, is planned and
+compared with the expected model size, device and thread count. Exits with
+code 1 if any plan differs, so changes to the model profiles or the planning
+rules that move a decision show up here.
+
+Usage (from the repo root):
+    python -m benchmarks.sim_resources
+    python -m benchmarks.sim_resources --json
+"""
+import os
+import sys
+import json
+import argparse
+
+from scripts.resources import ResourceEnvelope, plan_job
+
+ENVELOPES = {
+    "small-vm (2 cores, 4 GB)": ResourceEnvelope(available_ram_mb=4096, cpu_cores=2),
+    "cpu-node (8 cores, 16 GB)": ResourceEnvelope(available_ram_mb=16384, cpu_cores=8),
+    "big-cpu (32 cores, 64 GB)": ResourceEnvelope(available_ram_mb=65536, cpu_cores=32),
+    "gpu-node (8 cores, 32 GB, 16 GB GPU)": ResourceEnvelope(available_ram_mb=32768, cpu_cores=8, gpu_free_mb=16000),
+}
+AUDIO_SECONDS = [60, 600, 3600]
+CONCURRENCY = [1, 4]
+SUMMARIZER = "csebuetnlp/mT5_multilingual_XLSum"
+
+# (envelope, concurrent jobs) -> (model size, device, threads) for every audio
+# length; with the default budget of 1x real time the length does not matter
+EXPECTED = {
+    ("small-vm (2 cores, 4 GB)", 1): ("tiny", "cpu", 2),
+    # Nothing fits in 768 MB per job, so the smallest model is the fallback
+    ("small-vm (2 cores, 4 GB)", 4): ("tiny", "cpu", 1),
+    # large and medium fit in memory but are slower than real time on 8 cores
+    ("cpu-node (8 cores, 16 GB)", 1): ("small", "cpu", 8),
+    ("cpu-node (8 cores, 16 GB)", 4): ("base", "cpu", 2),
+    ("big-cpu (32 cores, 64 GB)", 1): ("large", "cpu", 32),
+    ("big-cpu (32 cores, 64 GB)", 4): ("small", "cpu", 8),
+    ("gpu-node (8 cores, 32 GB, 16 GB GPU)", 1): ("large", "cuda", 8),
+    ("gpu-node (8 cores, 32 GB, 16 GB GPU)", 4): ("small", "cuda", 2),
+}
+
+# (name, envelope, plan_job arguments, expected (model size, device, threads))
+CASES = [
+    ("tight latency budget", "cpu-node (8 cores, 16 GB)",
+     {"audio_seconds": 600, "latency_budget_s": 60}, ("tiny", "cpu", 8)),
+    ("no audio length, no budget", "cpu-node (8 cores, 16 GB)",
+     {}, ("large", "cpu", 8)),
+    ("loaded base is reused over small", "cpu-node (8 cores, 16 GB)",
+     {"audio_seconds": 600, "concurrent_jobs": 2, "loaded": [("base", SUMMARIZER, "cpu", "whisper")]},
+     ("base", "cpu", 4)),
+    ("resident base counts as available memory", "small-vm (2 cores, 4 GB)",
+     {"audio_seconds": 600, "loaded": [("base", SUMMARIZER, "cpu", "whisper")]}, ("base", "cpu", 2)),
+    ("resident GPU model counts as available memory", "gpu-node (8 cores, 32 GB, 16 GB GPU)",
+     {"audio_seconds": 600, "concurrent_jobs": 4, "loaded": [("medium", SUMMARIZER, "cuda", "whisper")]},
+     ("medium", "cuda", 2)),
+    ("loaded model on another device is not reused", "gpu-node (8 cores, 32 GB, 16 GB GPU)",
+     {"audio_seconds": 600, "concurrent_jobs": 4, "loaded": [("base", SUMMARIZER, "cpu", "whisper")]},
+     ("small", "cuda", 2)),
+    ("overrides", "gpu-node (8 cores, 32 GB, 16 GB GPU)",
+     {"audio_seconds": 600, "model_size": "medium", "device": "cpu", "threads": 3}, ("medium", "cpu", 3)),
+]
+
+
+def _plan(envelope_name, **kwargs):
+    kwargs = {"target_rtf": 1.0, "model_size": None, "device": None, "threads": None, **kwargs}
+    plan = plan_job(envelope=ENVELOPES[envelope_name], **kwargs)
+    return plan, (plan.model_size, plan.device, plan.intra_op_threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", action="store_true", help="Also print every plan as JSON")
+    args = parser.parse_args()
+
+    # Deployment overrides would replace the decisions under test
+    for name in ("WHISPER_MODEL_SIZE", "WHISPER_DEVICE", "TORCH_THREADS", "TARGET_RTF"):
+        os.environ.pop(name, None)
+
+    runs = [(f"{audio_seconds}s x{jobs}", name, {"audio_seconds": audio_seconds, "concurrent_jobs": jobs},
+             EXPECTED[(name, jobs)])
+            for name in ENVELOPES for audio_seconds in AUDIO_SECONDS for jobs in CONCURRENCY]
+    runs += CASES
+
+    rows = []
+    failures = []
+    for label, name, kwargs, expected in runs:
+        plan, got = _plan(name, **kwargs)
+        status = "ok" if got == expected else "FAIL"
+        print(f"{status:>4}  {name:<38} {label:<46} {got[0]:<6} on {got[1]}, {got[2]} threads"
+              + ("" if got == expected else f" (expected {expected[0]} on {expected[1]}, {expected[2]} threads)"))
+        if got != expected:
+            failures.append((label, name))
+        rows.append({"envelope": name, "case": label, **plan.as_dict()})
+
+    if args.json:
+        print(json.dumps(rows, indent=4))
+    if failures:
+        print(f"❌ {len(failures)} of {len(runs)} plans differ from the expected ones")
+        return 1
+    print(f"✅ All {len(runs)} plans match")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Memory soak test: many sequential jobs in one process, RSS sampled after each.
+
+Every job opens a HindiTranscriber as a context manager, transcribes and
+summarizes fixture audio with fresh checkpoints and the result cache turned
+off, and closes it, as a job worker does. RSS after the warm-up jobs is the
+baseline; the run fails (exit code 1) if RSS at the end has grown by more
+than --tolerance-mb or the least-squares slope exceeds --max-slope-mb per job.
+
+Usage (from the repo root):
+    python -m benchmarks.soak_memory --jobs 50 --model tiny
+    python -m benchmarks.soak_memory --jobs 50 --subprocess-summary --budget-mb 3000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+def slope(values):
+    n = len(values)
+    if n < 2:
+        return 0.0
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    num = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    den = sum((x - mean_x) ** 2 for x in range(n))
+    return num / den
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3, help="Jobs before the baseline is taken")
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--length", type=int, default=30, help="Fixture length in seconds")
+    parser.add_argument("--fixtures", default="benchmarks/fixtures_audio")
+    parser.add_argument("--subprocess-summary", action="store_true")
+    parser.add_argument("--budget-mb", type=int, default=0, help="WORKER_RSS_BUDGET_MB for the registry")
+    parser.add_argument("--tolerance-mb", type=float, default=50)
+    parser.add_argument("--max-slope-mb", type=float, default=1.0)
+    args = parser.parse_args()
+
+    # Every job must do the full work instead of hitting the cache
+    os.environ["RESULT_CACHE"] = "0"
+    os.environ["WORKER_RSS_BUDGET_MB"] = str(args.budget_mb)
+
+    from benchmarks.fixtures import make_fixtures
+    from scripts.checkpoint import PipelineCheckpoint
+    from scripts.metrics import current_rss_bytes
+    from scripts.transcribe import HindiTranscriber, release_memory
+
+    audio_path = make_fixtures(args.fixtures, [args.length])[args.length]
+    samples = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for job in range(args.jobs):
+            start = time.perf_counter()
+            checkpoint = PipelineCheckpoint(f"soak_{job}", transcript_dir=workdir, summary_dir=workdir,
+                                            state_dir=workdir)
+            with HindiTranscriber(model_size=args.model, device="cpu", language="hi",
+                                  summarize_in_subprocess=args.subprocess_summary) as transcriber:
+                transcriber.process_audio(workdir, audio_file=audio_path, checkpoint=checkpoint)
+            release_memory()
+            rss_mb = current_rss_bytes() / (1024 * 1024)
+            samples.append(rss_mb)
+            print(f"job {job + 1}/{args.jobs}: {time.perf_counter() - start:.1f}s, RSS {rss_mb:.0f} MB")
+
+    steady = samples[args.warmup:] or samples
+    report = {
+        "jobs": args.jobs,
+        "model": args.model,
+        "subprocess_summary": args.subprocess_summary,
+        "budget_mb": args.budget_mb,
+        "baseline_mb": steady[0],
+        "final_mb": steady[-1],
+        "peak_mb": max(samples),
+        "growth_mb": steady[-1] - steady[0],
+        "slope_mb_per_job": slope(steady),
+        "rss_mb": [round(sample, 1) for sample in samples],
+    }
+    print(json.dumps(report, indent=4))
+
+    if report["growth_mb"] > args.tolerance_mb or report["slope_mb_per_job"] > args.max_slope_mb:
+        print(f"❌ RSS grew by {report['growth_mb']:.0f} MB ({report['slope_mb_per_job']:.2f} MB/job)")
+        return 1
+    print("✅ RSS stayed flat")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
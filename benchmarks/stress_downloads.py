@@ -0,0 +1,195 @@
+"""
+Stress test for concurrent downloads and file naming.
+
+Runs --jobs download jobs across --processes worker processes with --threads
+threads each, as several job workers would. Jobs cycle through --videos
+distinct URLs and all share one title, so any naming by title would collide.
+Afterwards it checks that:
+    - every job for a URL got the same path, and each URL got its own file
+    - each video was downloaded once (in-flight dedup plus the file lock)
+    - no lock files or temporary download directories are left behind
+    - JSON exports of same-titled videos did not overwrite each other
+
+By default yt-dlp is replaced by a simulated one that writes a short WAV after
+--delay seconds (and audio is validated with the wave module instead of
+ffprobe), so the harness runs offline. With --url, every job downloads that
+real video instead.
+
+Usage (from the repo root):
+    python -m benchmarks.stress_downloads --jobs 64 --processes 4 --threads 8
+    python -m benchmarks.stress_downloads --jobs 8 --processes 2 --url https://www.youtube.com/watch?v=...
+"""
+import os
+import sys
+import json
+import glob
+import time
+import types
+import wave
+import argparse
+import tempfile
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+TITLE = "Same title for every job"
+
+
+def _write_silence(path, seconds=1, sample_rate=16000):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(b"\0\0" * sample_rate * seconds)
+
+
+def _is_wav(path):
+    try:
+        with wave.open(path, "rb") as f:
+            return f.getnframes() > 0
+    except Exception:
+        return False
+
+
+def install_simulated_ytdlp(delay, log_path):
+    """Put a stand-in yt_dlp module in sys.modules; each real download appends a line to `log_path`."""
+    import scripts.download_audio as download_audio
+
+    class DownloadError(Exception):
+        pass
+
+    class YoutubeDL:
+        def __init__(self, opts):
+            self.opts = opts
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def extract_info(self, url, download=False):
+            return {"id": url.rsplit("=", 1)[-1], "ext": "webm", "acodec": "opus", "title": TITLE}
+
+        def process_ie_result(self, info, download=True):
+            time.sleep(delay)
+            path = self.opts["outtmpl"].replace("%(ext)s", "wav")
+            _write_silence(path)
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(f"{info['id']}\n")
+            return dict(info, ext="wav")
+
+    module = types.ModuleType("yt_dlp")
+    module.YoutubeDL = YoutubeDL
+    module.utils = types.SimpleNamespace(DownloadError=DownloadError)
+    sys.modules["yt_dlp"] = module
+    download_audio.has_audio_stream = _is_wav
+
+
+def _worker(urls, output_folder, threads, simulate, delay, log_path):
+    """One job worker process: downloads `urls` with `threads` threads; returns [(url, path or error)]."""
+    if simulate:
+        install_simulated_ytdlp(delay, log_path)
+    from scripts.download_audio import download_audio
+
+    def job(url):
+        try:
+            return url, download_audio(url, TITLE, output_folder=output_folder, audio_format="wav")
+        except Exception as e:
+            return url, f"error: {e}"
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(job, urls))
+
+
+def _export_worker(items, output_folder):
+    from scripts.save_json import write_json_file, json_file_id
+    return [write_json_file(TITLE, f"transcript of {video_id}", "summary", output_folder,
+                            file_id=json_file_id(video_id, url)) for url, video_id in items]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=64)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8, help="Jobs run concurrently in each process")
+    parser.add_argument("--videos", type=int, default=4, help="Distinct URLs the jobs cycle through")
+    parser.add_argument("--delay", type=float, default=0.5, help="Simulated download time in seconds")
+    parser.add_argument("--url", help="Download this real video in every job instead of simulating")
+    args = parser.parse_args()
+
+    # Every video must really be fetched once, not restored from an earlier run's cache
+    os.environ["RESULT_CACHE"] = "0"
+
+    simulate = args.url is None
+    urls = [args.url] if args.url else [f"https://www.youtube.com/watch?v=stress{i:03d}" for i in range(args.videos)]
+    jobs = [urls[i % len(urls)] for i in range(args.jobs)]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        output_folder = os.path.join(workdir, "raw_audio")
+        log_path = os.path.join(workdir, "downloads.log")
+        open(log_path, "w").close()
+
+        start = time.perf_counter()
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=args.processes, mp_context=context) as pool:
+            shards = [jobs[i::args.processes] for i in range(args.processes)]
+            futures = [pool.submit(_worker, shard, output_folder, args.threads, simulate, args.delay, log_path)
+                       for shard in shards if shard]
+            results = [item for future in futures for item in future.result()]
+
+            json_folder = os.path.join(workdir, "json_files")
+            items = [(url, url.rsplit("=", 1)[-1]) for url in urls]
+            exports = [path for future in [pool.submit(_export_worker, items, json_folder)
+                                           for _ in range(args.processes)]
+                       for path in future.result()]
+        elapsed = time.perf_counter() - start
+
+        paths = defaultdict(set)
+        errors = []
+        for url, path in results:
+            if path.startswith("error: "):
+                errors.append({"url": url, "error": path})
+            else:
+                paths[url].add(path)
+
+        with open(log_path, encoding="utf-8") as f:
+            downloads = [line.strip() for line in f if line.strip()]
+        leftovers = (glob.glob(os.path.join(output_folder, "*.lock"))
+                     + glob.glob(os.path.join(output_folder, ".*"))
+                     + glob.glob(os.path.join(output_folder, "*.tmp")))
+
+        checks = {
+            "no_errors": not errors,
+            "one_path_per_url": all(len(p) == 1 for p in paths.values()),
+            "distinct_files_per_url": len({next(iter(p)) for p in paths.values()}) == len(paths),
+            "files_exist": all(os.path.exists(next(iter(p))) for p in paths.values()),
+            "no_leftovers": not leftovers,
+            "distinct_json_exports": len(set(exports)) == len(urls),
+        }
+        if simulate:
+            checks["one_download_per_video"] = sorted(downloads) == sorted(url.rsplit("=", 1)[-1] for url in urls)
+
+        report = {
+            "jobs": args.jobs,
+            "processes": args.processes,
+            "threads": args.threads,
+            "videos": len(urls),
+            "simulated": simulate,
+            "seconds": round(elapsed, 2),
+            "downloads": len(downloads) if simulate else None,
+            "checks": checks,
+            "errors": errors[:5],
+            "leftovers": leftovers,
+        }
+    print(json.dumps(report, indent=4))
+
+    if not all(checks.values()):
+        print("❌ Concurrent downloads interfered with each other")
+        return 1
+    print("✅ Concurrent downloads stayed consistent")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,51 +1,153 @@
 import os
 import sys
-from flask import Flask, request, render_template
+import json
+import time
+import multiprocessing
+from flask import Flask, request, render_template, jsonify, Response, stream_with_context
 
 from scripts.logger import logging
 from scripts.exception import MyException
-from scripts.download_audio import download_audio
-from scripts.transcribe import HindiTranscriber
-from scripts.save_json import save_transcript_and_summary
-import torch 
+from scripts.transcribe import HindiTranscriber, model_registry, DEFAULT_SUMMARIZER
+from scripts.jobs import JobQueue, SQLiteJobStore, QueueFullError, PENDING, RUNNING, DONE, FAILED, CANCELLED
+from scripts.metrics import metrics
+from scripts.store import get_transcript_store
+from scripts.resources import plan_job, apply_thread_settings, audio_duration
+from scripts.pipeline import run_pipeline, checkpoint_for
+from scripts.subtitles import render, CONTENT_TYPES
+from scripts.postprocess import clean_segments
 
 app = Flask(__name__)
 
+# When unset, the model size is chosen per job from available resources (see scripts.resources)
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE")
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "whisper")
+AUDIO_FORMAT = os.getenv("AUDIO_FORMAT", "wav")
+SEGMENTED_TRANSCRIPTION = os.getenv("SEGMENTED_TRANSCRIPTION", "0") == "1"
+BATCHED_DECODING = os.getenv("BATCHED_DECODING", "0") == "1"
+# Use YouTube captions instead of Whisper when they look usable (see scripts.captions)
+CAPTIONS_FIRST = os.getenv("CAPTIONS_FIRST", "0") == "1"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+# Jobs sharing a worker's models take turns on the Whisper model (see InferenceBackend),
+# so more than one thread per worker only overlaps decoding with BATCHED_DECODING=1
+JOB_THREADS = int(os.getenv("JOB_THREADS", 1))
+# Live streams follow a job's checkpoint; each connection ends well before the
+# gunicorn worker timeout and the browser reconnects after STREAM_RETRY_MS
+STREAM_POLL_S = float(os.getenv("STREAM_POLL_S", 1))
+STREAM_CONNECTION_S = float(os.getenv("STREAM_CONNECTION_S", 60))
+STREAM_RETRY_MS = int(os.getenv("STREAM_RETRY_MS", 1000))
+STREAM_STATUS_MESSAGES = {
+    PENDING: "Queued...",
+    RUNNING: "Transcribing...",
+    DONE: "Processing complete",
+}
+
+# Optionally load models when a job worker starts so the first job does not pay
+# for it; web workers never load models (they are not multiprocessing children)
+if os.getenv("WARMUP_MODELS", "0") == "1" and multiprocessing.parent_process() is not None:
+    warmup_plan = plan_job(concurrent_jobs=JOB_WORKERS * JOB_THREADS, model_size=WHISPER_MODEL_SIZE)
+    logging.info(f"Warming up models: {warmup_plan.model_size}")
+    model_registry.warm_up([(warmup_plan.model_size, DEFAULT_SUMMARIZER, warmup_plan.device, WHISPER_BACKEND)])
+
+
+def create_transcriber(audio_path, model_size=None, backend=None):
+    """
+    Picks model size, device and thread counts for this job from the available
+    resources and the audio length, then binds a transcriber to the shared models.
+    A resumed job passes the model size and backend it was started with.
+    """
+    plan = plan_job(
+        audio_seconds=audio_duration(audio_path),
+        concurrent_jobs=JOB_WORKERS * JOB_THREADS,
+        model_size=model_size or WHISPER_MODEL_SIZE,
+        loaded=model_registry.loaded_keys()
+    )
+    apply_thread_settings(plan)
+    return HindiTranscriber(model_size=plan.model_size, device=plan.device, backend=backend or WHISPER_BACKEND)
+
 def process_video(video_title, url):
     """
     Processes the video: downloads audio, transcribes it, generates a summary, and saves results.
+    Each stage is checkpointed, so resubmitting a failed video resumes where it stopped.
     """
     try:
-        if not video_title or not url:
-            raise ValueError("Video title and URL are required.")
-
-        logging.info(f"Downloading audio for: {video_title}")
-        audio_path = download_audio(url, video_title)
-        if not os.path.exists(audio_path):
-            raise FileNotFoundError("Failed to download audio.")
-
-        logging.info("Initializing HindiTranscriber...")
-        # Device is automatically selected in HindiTranscriber (GPU if available)
-        transcriber = HindiTranscriber(
-            model_size="medium",
-            audio_file=audio_path
+        # Models come from the shared registry; size and device are chosen per job
+        return run_pipeline(
+            video_title, url, create_transcriber,
+            audio_format=AUDIO_FORMAT,
+            segmented=SEGMENTED_TRANSCRIPTION,
+            batched=BATCHED_DECODING,
+            captions_first=CAPTIONS_FIRST
         )
 
-        logging.info("Processing transcription...")
-        final_transcription, summary = transcriber.process_audio(
-            output_dir="downloads/transcribed_text"
-        )
-
-        logging.info("Saving transcript and summary to JSON...")
-        save_transcript_and_summary(video_title, final_transcription, summary)
-
-        return final_transcription, summary
-
     except Exception as e:
         logging.error(f"Error processing video: {e}")
         raise MyException(str(e), sys)
 
 
+def sse_event(event, data, event_id=None):
+    event_id = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{event_id}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stream_job(job_id, last_index=-1):
+    """
+    Generator of server-sent events for a queued job: its status, each decoded
+    window's segments as soon as the job worker checkpoints them, then the summary.
+    Window events carry their index as event id, so a reconnecting browser sends
+    it back as Last-Event-ID and only gets the windows after it. The connection
+    is closed after STREAM_CONNECTION_S, before the web worker's timeout; the
+    browser then reconnects by itself.
+    """
+    deadline = time.monotonic() + STREAM_CONNECTION_S
+    status = None
+    yield f"retry: {STREAM_RETRY_MS}\n\n"
+    while True:
+        job = job_queue.status(job_id)
+        if job is None:
+            yield sse_event("failed", {"error": "Job not found."})
+            return
+
+        # Read after the status, so a finished job has all its windows on disk
+        checkpoint = checkpoint_for(job["payload"]["video_title"], job["payload"]["url"])
+        windows = checkpoint.read_windows()
+        if job["status"] != status:
+            status = job["status"]
+            yield sse_event("status", {"message": STREAM_STATUS_MESSAGES.get(status, status)})
+        while last_index + 1 in windows:
+            last_index += 1
+            window = windows[last_index]
+            for segment in clean_segments(window["segments"], lang=window.get("language") or "hi"):
+                yield sse_event("segment", segment, event_id=last_index)
+
+        if job["status"] == DONE:
+            yield sse_event("summary", {"summary": job["result"]["summary"]})
+            yield sse_event("done", {"transcription": job["result"]["transcription"]})
+            return
+        if job["status"] in (FAILED, CANCELLED):
+            yield sse_event("failed", {"error": job["error"] or "Job was cancelled."})
+            return
+        if time.monotonic() >= deadline:
+            return
+        time.sleep(STREAM_POLL_S)
+
+
+def run_video_job(video_title, url):
+    """Job handler executed in a worker process; returns a JSON-serializable result."""
+    transcription, summary = process_video(video_title, url)
+    return {"transcription": transcription, "summary": summary}
+
+
+job_queue = JobQueue(
+    run_video_job,
+    store=SQLiteJobStore(os.getenv("JOB_DB_PATH", "downloads/jobs.sqlite3")),
+    num_workers=JOB_WORKERS,
+    max_pending=int(os.getenv("JOB_MAX_PENDING", 20)),
+    # Several jobs per worker process share its models; with BATCHED_DECODING=1
+    # their audio windows are decoded in the same batches.
+    threads_per_worker=JOB_THREADS
+)
+
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     """
@@ -59,21 +161,119 @@ def index():
             return render_template("index.html", error="Video title and URL are required.")
 
         try:
-            transcription, summary = process_video(video_title, url)
-
-            return render_template(
-                "index.html",
-                message="✅ Processing complete!",
-                video_title=video_title,
-                transcription=transcription,
-                summary=summary
-            )
+            job_id = job_queue.submit(video_title=video_title, url=url)
+            return render_template("index.html", job_id=job_id, video_title=video_title), 202
+        except QueueFullError as e:
+            return render_template("index.html", error=f"❌ {str(e)}"), 503
         except Exception as e:
             return render_template("index.html", error=f"❌ {str(e)}")
 
     return render_template("index.html")
 
 
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """
+    Queues a video like the form does and returns the job id as JSON.
+    """
+    video_title = request.form.get("video_title", "").strip()
+    url = request.form.get("video_url", "").strip()
+
+    if not video_title or not url:
+        return jsonify({"error": "Video title and URL are required."}), 400
+
+    try:
+        job_id = job_queue.submit(video_title=video_title, url=url)
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify({"id": job_id, "status": PENDING}), 202
+
+
+@app.route("/jobs/<job_id>/stream", methods=["GET"])
+def stream_job_events(job_id):
+    """
+    Streams a job's transcript segments to the browser as server-sent events.
+    """
+    last_index = request.headers.get("Last-Event-ID", -1, type=int)
+    return Response(
+        stream_with_context(stream_job(job_id, last_index)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """
+    Exposes pipeline stage timings, counters and memory in Prometheus format.
+    """
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/transcripts/<int:record_id>", methods=["GET"])
+def get_transcript(record_id):
+    """
+    Returns a stored transcript by id.
+    """
+    record = get_transcript_store().get(record_id)
+    if record is None:
+        return jsonify({"error": "Transcript not found."}), 404
+    return jsonify(record)
+
+
+@app.route("/transcripts/<int:record_id>/segments.<any(srt, vtt, json):fmt>", methods=["GET"])
+def get_transcript_segments(record_id, fmt):
+    """
+    Streams a stored transcript's timed segments as SRT, WebVTT or segment JSON.
+    """
+    record = get_transcript_store().get(record_id)
+    if record is None:
+        return jsonify({"error": "Transcript not found."}), 404
+    if not record.get("segments"):
+        return jsonify({"error": "Transcript has no timed segments."}), 404
+    return Response(stream_with_context(render(record["segments"], fmt)), content_type=CONTENT_TYPES[fmt])
+
+
+@app.route("/search", methods=["GET"])
+def search_transcripts():
+    """
+    Full-text search over stored titles, transcripts and summaries.
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Query parameter 'q' is required."}), 400
+    limit = max(1, min(request.args.get("limit", 20, type=int), 100))
+    return jsonify({"query": query, "results": get_transcript_store().search(query, limit)})
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """
+    Reports the status of a queued job, with its results once finished.
+    """
+    job = job_queue.status(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+
+    return jsonify({
+        "id": job["id"],
+        "status": job["status"],
+        "video_title": job["payload"].get("video_title"),
+        "result": job["result"],
+        "error": job["error"],
+    })
+
+
+@app.route("/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_job(job_id):
+    """
+    Cancels a pending or running job.
+    """
+    if not job_queue.cancel(job_id):
+        return jsonify({"error": "Job not found or already finished."}), 409
+    return jsonify({"id": job_id, "status": "cancelling"})
+
+
 # Gunicorn entry point
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 5000))  # Default to port 5000 if not set
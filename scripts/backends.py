@@ -0,0 +1,161 @@
+import sys
+import threading
+from scripts.logger import logging
+from scripts.exception import MyException
+
+
+class InferenceBackend:
+    """
+    Interface for Whisper inference backends.
+    `transcribe` takes a 16 kHz float32 array (or a path) and returns a dict
+    shaped like whisper's result: {"text", "segments": [{"start", "end", "text"}], "language"}.
+
+    One loaded backend is shared by all jobs in a worker process. openai-whisper
+    keeps its decoder KV cache in forward hooks on the shared model, so two
+    threads running it at once corrupt each other's decoding; every forward
+    pass on such a model, including the batch scheduler's, holds `lock`.
+    """
+
+    name = None
+
+    def __init__(self, model_size, device):
+        self.model_size = model_size
+        self.device = device
+        self.lock = threading.Lock()
+
+    def transcribe(self, audio, language="hi", **kwargs):
+        raise NotImplementedError
+
+    def detect_language(self, audio, windows=1):
+        """Language probabilities {code: p} from the first `windows` 30 s windows of a float32 array."""
+        raise NotImplementedError
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+
+class WhisperBackend(InferenceBackend):
+    """Reference openai-whisper model in PyTorch (fp32 on CPU)."""
+
+    name = "whisper"
+
+    def __init__(self, model_size, device):
+        super().__init__(model_size, device)
+        import whisper
+        self.model = whisper.load_model(model_size, device=device)
+
+    def transcribe(self, audio, language="hi", **kwargs):
+        with self.lock:
+            return self.model.transcribe(audio, language=language, **kwargs)
+
+    def detect_language(self, audio, windows=1):
+        import torch
+        import whisper
+
+        # Mel features only for the windows used, computed from the samples already in memory
+        n = whisper.audio.N_SAMPLES
+        count = max(1, min(windows, -(-len(audio) // n)))
+        device = next(self.model.parameters()).device
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(audio[i * n:(i + 1) * n])),
+                                        self.model.dims.n_mels)
+            for i in range(count)
+        ]).to(device)
+        with self.lock, torch.no_grad():
+            _, probs = self.model.detect_language(mels)
+        return {lang: sum(p[lang] for p in probs) / len(probs) for lang in probs[0]}
+
+
+class QuantizedWhisperBackend(WhisperBackend):
+    """openai-whisper with the linear layers dynamically quantized to int8 (CPU only)."""
+
+    name = "whisper-int8"
+
+    def __init__(self, model_size, device):
+        if device != "cpu":
+            raise MyException("The whisper-int8 backend only runs on CPU.", sys)
+        super().__init__(model_size, device)
+        import torch
+        import whisper
+
+        # whisper's Linear subclass only adds a dtype cast, which is a no-op in fp32;
+        # turn it back into nn.Linear so quantize_dynamic recognises the layers.
+        for module in self.model.modules():
+            if isinstance(module, whisper.model.Linear):
+                module.__class__ = torch.nn.Linear
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def transcribe(self, audio, language="hi", **kwargs):
+        kwargs.setdefault("fp16", False)
+        return super().transcribe(audio, language=language, **kwargs)
+
+
+class CTranslate2Backend(InferenceBackend):
+    """
+    CTranslate2 int8 inference through the faster-whisper package, if installed.
+    CTranslate2 models accept concurrent calls, so `lock` is not taken.
+    """
+
+    name = "ctranslate2"
+
+    def __init__(self, model_size, device):
+        super().__init__(model_size, device)
+        from faster_whisper import WhisperModel
+        compute_type = "int8" if device == "cpu" else "float16"
+        self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
+
+    @classmethod
+    def is_available(cls):
+        try:
+            import faster_whisper  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def detect_language(self, audio, windows=1):
+        n = 30 * 16000
+        if hasattr(self.model, "detect_language"):
+            _, _, all_probs = self.model.detect_language(audio[:n * windows], language_detection_segments=windows)
+        else:
+            # Older faster-whisper: segments are decoded lazily, so this only runs detection
+            _, info = self.model.transcribe(audio[:n], language=None)
+            all_probs = info.all_language_probs or [(info.language, info.language_probability)]
+        return dict(all_probs)
+
+    def transcribe(self, audio, language="hi", word_timestamps=False, **kwargs):
+        segments, info = self.model.transcribe(audio, language=language, word_timestamps=word_timestamps)
+        result_segments = []
+        for segment in segments:
+            item = {"start": segment.start, "end": segment.end, "text": segment.text}
+            if word_timestamps and segment.words:
+                item["words"] = [{"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+                                 for w in segment.words]
+            result_segments.append(item)
+        return {
+            "text": "".join(segment["text"] for segment in result_segments),
+            "segments": result_segments,
+            "language": info.language,
+        }
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (WhisperBackend, QuantizedWhisperBackend, CTranslate2Backend)
+}
+
+DEFAULT_BACKEND = "whisper"
+
+
+def available_backends():
+    return [name for name, backend in BACKENDS.items() if backend.is_available()]
+
+
+def load_backend(name, model_size, device):
+    if name not in BACKENDS:
+        raise MyException(f"Unknown inference backend: {name}. Choose from {list(BACKENDS)}.", sys)
+    backend = BACKENDS[name]
+    if not backend.is_available():
+        raise MyException(f"Inference backend '{name}' is not installed.", sys)
+    logging.info(f"Loading '{name}' backend for Whisper '{model_size}' on {device}")
+    return backend(model_size, device)
@@ -0,0 +1,197 @@
+"""
+Batch ingestion for playlists, channels and URL lists.
+
+Downloads run concurrently up to --max-downloads; each finished download is
+handed straight to a pool of transcription workers so the network and the CPU
+stay busy at the same time. Progress is appended to a state file, and rerunning
+the same batch skips items that already completed.
+
+Usage:
+    python -m scripts.batch https://www.youtube.com/playlist?list=... --max-downloads 4 --workers 2
+    python -m scripts.batch --file urls.txt --state downloads/batch_state.jsonl
+"""
+import os
+import sys
+import json
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from scripts.exception import MyException
+from scripts.logger import logging
+from scripts.download_audio import download_audio, fetch_info
+
+
+PLAYLIST_MARKERS = ("list=", "/playlist", "/channel/", "/c/", "/user/", "/@")
+
+
+class BatchState:
+    """Append-only JSONL record of item status, used to resume a batch."""
+
+    def __init__(self, path="downloads/batch_state.jsonl"):
+        self.path = path
+        self._lock = threading.Lock()
+        self.status = {}
+        state_dir = os.path.dirname(path)
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash can leave a partial last line; ignore it
+                        continue
+                    self.status[record["key"]] = record
+
+    def is_done(self, key):
+        return self.status.get(key, {}).get("status") == "done"
+
+    def record(self, key, status, **fields):
+        record = {"key": key, "status": status, **fields}
+        with self._lock:
+            self.status[key] = record
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def expand_sources(sources):
+    """
+    Turn URLs, playlists and channels into a list of (key, url) items.
+    Playlists and channels are listed with a flat extraction, so no per-video
+    metadata is fetched here.
+    """
+    import yt_dlp
+
+    items = []
+    for source in sources:
+        if not any(marker in source for marker in PLAYLIST_MARKERS):
+            items.append((source, source))
+            continue
+
+        with yt_dlp.YoutubeDL({'quiet': True, 'extract_flat': 'in_playlist'}) as ydl:
+            playlist = ydl.extract_info(source, download=False)
+        for entry in playlist.get("entries") or []:
+            url = entry.get("url") or entry.get("webpage_url")
+            if not url:
+                continue
+            if not url.startswith("http"):
+                url = f"https://www.youtube.com/watch?v={entry['id']}"
+            items.append((entry.get("id") or url, url))
+        logging.info(f"Expanded {source} into {len(playlist.get('entries') or [])} items")
+    return items
+
+
+def read_url_file(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def _transcribe_item(audio_path, title, model_size, url=None, video_id=None):
+    """Runs in a transcription worker process; models stay loaded between items."""
+    from scripts.transcribe import HindiTranscriber
+    from scripts.save_json import save_transcript_and_summary
+
+    with HindiTranscriber(model_size=model_size) as transcriber:
+        transcript, summary = transcriber.process_audio("downloads/transcribed_text", audio_file=audio_path)
+        model_config = transcriber.model_config()
+        segments = transcriber.segments
+    return save_transcript_and_summary(
+        title, transcript, summary, url=url, video_id=video_id, model_config=model_config, segments=segments
+    )
+
+
+def _download_item(url, audio_format):
+    # One metadata pass per item, reused for the download itself
+    info = fetch_info(url)
+    title = info.get("title") or info.get("id") or url
+    audio_path = download_audio(url, title, audio_format=audio_format, info=info)
+    return title, audio_path, info.get("id")
+
+
+def run_batch(sources, state_path="downloads/batch_state.jsonl", max_downloads=4, workers=1,
+              model_size="base", audio_format="wav"):
+    """Download and transcribe every item, skipping those already done in `state_path`."""
+    state = BatchState(state_path)
+    items = [(key, url) for key, url in expand_sources(sources) if not state.is_done(key)]
+    logging.info(f"Batch has {len(items)} items left to process")
+
+    transcribe_pool = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+    transcriptions = {}
+    failed = 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_downloads) as download_pool:
+            downloads = {download_pool.submit(_download_item, url, audio_format): (key, url)
+                         for key, url in items}
+
+            for future in as_completed(downloads):
+                key, url = downloads[future]
+                try:
+                    title, audio_path, video_id = future.result()
+                except Exception as e:
+                    logging.error(f"Download failed for {url}: {e}")
+                    state.record(key, "failed", url=url, stage="download", error=str(e))
+                    failed += 1
+                    continue
+
+                state.record(key, "downloaded", url=url, title=title, audio_path=audio_path)
+                transcriptions[transcribe_pool.submit(
+                    _transcribe_item, audio_path, title, model_size, url, video_id
+                )] = (key, url, title)
+
+        for future in as_completed(transcriptions):
+            key, url, title = transcriptions[future]
+            try:
+                json_path = future.result()
+                state.record(key, "done", url=url, title=title, json_path=json_path)
+                logging.info(f"✅ Finished {title}")
+            except Exception as e:
+                logging.error(f"Transcription failed for {url}: {e}")
+                state.record(key, "failed", url=url, stage="transcribe", error=str(e))
+                failed += 1
+    finally:
+        transcribe_pool.shutdown(wait=True)
+
+    return len(items) - failed, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("urls", nargs="*", help="Video, playlist or channel URLs")
+    parser.add_argument("--file", help="File with one URL per line")
+    parser.add_argument("--state", default="downloads/batch_state.jsonl")
+    parser.add_argument("--max-downloads", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=1, help="Transcription worker processes")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--audio-format", default="wav")
+    args = parser.parse_args(argv)
+
+    sources = list(args.urls)
+    if args.file:
+        sources.extend(read_url_file(args.file))
+    if not sources:
+        parser.error("Provide at least one URL or --file.")
+
+    try:
+        done, failed = run_batch(
+            sources, state_path=args.state, max_downloads=args.max_downloads,
+            workers=args.workers, model_size=args.model, audio_format=args.audio_format
+        )
+    except Exception as e:
+        raise MyException(str(e), sys)
+
+    print(f"✅ {done} items processed, ❌ {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
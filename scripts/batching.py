@@ -0,0 +1,128 @@
+import sys
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from scripts.logger import logging
+from scripts.exception import MyException
+from scripts.segmentation import SAMPLE_RATE, split_on_silence
+
+
+WINDOW_S = 30
+
+
+class BatchScheduler:
+    """
+    Collects 30-second windows from concurrent transcriptions into one
+    encoder/decoder batch.
+
+    Each call to `transcribe` cuts its audio at silences into windows of at
+    most 30 s and queues them. A single scheduler thread waits until
+    `max_batch_size` windows are queued or `max_wait_s` has passed since the
+    first one arrived, decodes them together with `whisper.decode`, and routes
+    each decoded window back to the job that submitted it. Windows in different
+    languages are decoded in separate batches.
+    Only backends built on an openai-whisper model (whisper, whisper-int8) are supported.
+    """
+
+    def __init__(self, backend, max_batch_size=8, max_wait_s=0.05, language="hi"):
+        if not hasattr(backend, "model") or not hasattr(backend.model, "embed_audio"):
+            raise MyException(f"Batched decoding needs an openai-whisper backend, not '{backend.name}'.", sys)
+        # Weak reference, so the scheduler thread stops once the model is evicted
+        self._backend_ref = weakref.ref(backend)
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_s
+        self.language = language
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def transcribe(self, audio, language=None):
+        """Transcribe a 16 kHz float32 array; returns a whisper-like {"text", "segments"} dict."""
+        language = language or self.language
+        windows = split_on_silence(audio, target_s=WINDOW_S - 5, max_s=WINDOW_S, overlap_s=0)
+        futures = []
+        for start, end in windows:
+            future = Future()
+            self._queue.put((audio[start:end], language, future))
+            futures.append((start / SAMPLE_RATE, end / SAMPLE_RATE, future))
+
+        segments = []
+        for start, end, future in futures:
+            text = future.result().strip()
+            if text:
+                segments.append({"start": round(start, 2), "end": round(end, 2), "text": text})
+        return {"text": " ".join(segment["text"] for segment in segments), "segments": segments}
+
+    def _collect(self):
+        try:
+            batch = [self._queue.get(timeout=1)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                if self._backend_ref() is None:
+                    return
+                continue
+            by_language = {}
+            for audio, language, future in batch:
+                by_language.setdefault(language, []).append((audio, future))
+            for language, items in by_language.items():
+                try:
+                    texts = self._decode([audio for audio, _ in items], language)
+                    for (_, future), text in zip(items, texts):
+                        future.set_result(text)
+                except Exception as e:
+                    logging.error(f"Batched decoding failed: {e}")
+                    for _, future in items:
+                        future.set_exception(e)
+
+    def _decode(self, windows, language):
+        import torch
+        import whisper
+
+        backend = self._backend_ref()
+        if backend is None:
+            raise MyException("The model for this batch scheduler was unloaded.", sys)
+        model = backend.model
+        device = next(model.parameters()).device
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(window)), model.dims.n_mels)
+            for window in windows
+        ]).to(device)
+        options = whisper.DecodingOptions(
+            language=language, without_timestamps=True, fp16=device.type == "cuda"
+        )
+        # Direct transcribe/detect_language calls on the same model must not run meanwhile
+        with backend.lock, torch.no_grad():
+            results = whisper.decode(model, mels, options)
+        logging.debug(f"Decoded a batch of {len(windows)} windows")
+        return [result.text for result in results]
+
+
+_schedulers_lock = threading.Lock()
+
+
+def get_batch_scheduler(backend, max_batch_size=8, max_wait_s=0.05, language="hi"):
+    """Return the scheduler attached to a loaded backend, creating it on first use."""
+    with _schedulers_lock:
+        # Kept on the backend so it is released together with the model
+        scheduler = getattr(backend, "_batch_scheduler", None)
+        if scheduler is None:
+            scheduler = BatchScheduler(backend, max_batch_size, max_wait_s, language)
+            backend._batch_scheduler = scheduler
+        return scheduler
@@ -0,0 +1,161 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from scripts.logger import logging
+from scripts.metrics import metrics
+
+
+def md5_of_file(path, block_size=1024 * 1024):
+    """Return the md5 hex digest of a file's contents, read in blocks."""
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def md5_of_text(text):
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed, size-bounded cache on local disk.
+
+    Entries use the same layout as the DVC cache (`files/md5/<2 chars>/<rest>`),
+    keyed by the md5 of a key string. Hits refresh an entry's mtime and the
+    least recently used entries are evicted once the cache exceeds `max_bytes`.
+    """
+
+    def __init__(self, root="downloads/cache", max_bytes=None):
+        if max_bytes is None:
+            max_bytes = int(os.getenv("RESULT_CACHE_MAX_MB", 2048)) * 1024 * 1024
+        self.root = root
+        self.objects_dir = os.path.join(root, "files", "md5")
+        self.max_bytes = max_bytes
+        self.enabled = os.getenv("RESULT_CACHE", "1") == "1"
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        digest = md5_of_text(key)
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def _record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics.incr("cache_hits" if hit else "cache_misses")
+
+    def _lookup(self, key, read):
+        """
+        `read(path)` of the entry for `key`, or None on a miss. Another process
+        may evict the entry at any moment, so one that cannot be read is a miss.
+        """
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            # Touched first so eviction sees it as recently used
+            os.utime(path)
+            value = read(path)
+        except FileNotFoundError:
+            self._record(False)
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Unreadable cache entry for {key}, treating it as a miss: {e}")
+            self._record(False)
+            return None
+        self._record(True)
+        logging.info(f"Cache hit: {key}")
+        return value
+
+    def _store(self, key, write):
+        """Write an entry through `write(tmp_path)` and move it into place atomically."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+        return path
+
+    def get_json(self, key):
+        def read(path):
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        return self._lookup(key, read)
+
+    def put_json(self, key, value):
+        def write(tmp_path):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+        return self._store(key, write)
+
+    def get_file(self, key, dest_path):
+        """Materialize a cached file at `dest_path` (hard link when possible). Returns dest_path or None."""
+        def read(path):
+            _link_or_copy(path, dest_path)
+            return dest_path
+        return self._lookup(key, read)
+
+    def put_file(self, key, src_path):
+        return self._store(key, lambda tmp_path: _link_or_copy(src_path, tmp_path))
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.objects_dir):
+            for name in filenames:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            logging.info(f"Evicted cache entry: {path}")
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+def _link_or_copy(src, dest):
+    if os.path.exists(dest):
+        os.remove(dest)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+result_cache = ResultCache()
@@ -0,0 +1,217 @@
+"""
+Captions-first fast path.
+
+yt-dlp's metadata already lists a video's subtitles and automatic captions.
+When a track in one of the wanted languages looks usable, its cues are parsed
+(SRV3 or WebVTT) into timed segments and used as the transcript, so neither
+the audio download nor Whisper has to run. `caption_confidence` decides what
+"usable" means; below CAPTION_MIN_CONFIDENCE the job falls back to ASR.
+
+Usage (score local caption files):
+    python -m scripts.captions benchmarks/fixtures_captions/manual.hi.vtt --duration 20
+"""
+import os
+import re
+import sys
+import html
+import argparse
+import xml.etree.ElementTree as ET
+from scripts.exception import MyException
+from scripts.logger import logging
+from scripts.language import ALLOWED_LANGUAGES
+
+
+CAPTION_FORMATS = ("srv3", "vtt")
+CAPTION_MIN_CONFIDENCE = float(os.getenv("CAPTION_MIN_CONFIDENCE", 0.6))
+# Automatic captions are machine transcripts themselves, so they start lower
+KIND_WEIGHTS = {"manual": 1.0, "auto": 0.8}
+# Plausible characters per second of speech in a caption track
+MIN_CHARS_PER_S = 2
+MAX_CHARS_PER_S = 40
+
+SCRIPTS = {
+    "hi": re.compile(r"[ऀ-ॿ]"),
+    "mr": re.compile(r"[ऀ-ॿ]"),
+    "ne": re.compile(r"[ऀ-ॿ]"),
+    "en": re.compile(r"[A-Za-z]"),
+}
+LETTER = re.compile(r"[^\W\d_]")
+VTT_TIMING = re.compile(r"((?:\d+:)?\d{2}:\d{2}\.\d{3})\s+-->\s+((?:\d+:)?\d{2}:\d{2}\.\d{3})")
+VTT_TAG = re.compile(r"<[^>]*>")
+# Non-speech cues such as [Music] or [संगीत]
+NON_SPEECH = re.compile(r"^\s*[\[(][^\])]*[\])]\s*$")
+
+
+def _vtt_seconds(timestamp):
+    parts = [float(part) for part in timestamp.split(":")]
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + part
+    return seconds
+
+
+def parse_vtt(text):
+    """
+    Parse WebVTT into [{"start", "end", "text"}]. YouTube's automatic captions
+    repeat the previous line in every cue; only lines not shown in the
+    previous cue are kept.
+    """
+    segments = []
+    previous_lines = []
+    # Only truly empty lines end a cue; automatic captions contain lines holding a single space
+    for block in re.split(r"\n\n+", text.replace("\r\n", "\n")):
+        lines = block.strip().split("\n")
+        for i, line in enumerate(lines):
+            match = VTT_TIMING.search(line)
+            if match:
+                break
+        else:
+            continue
+
+        cue_lines = [html.unescape(VTT_TAG.sub("", line)).strip() for line in lines[i + 1:]]
+        cue_lines = [line for line in cue_lines if line]
+        new_lines = [line for line in cue_lines if line not in previous_lines]
+        previous_lines = cue_lines
+        if not new_lines:
+            continue
+        segments.append({
+            "start": round(_vtt_seconds(match.group(1)), 2),
+            "end": round(_vtt_seconds(match.group(2)), 2),
+            "text": " ".join(new_lines),
+        })
+    return segments
+
+
+def parse_srv3(text):
+    """Parse YouTube's SRV3 timed-text XML (<p t="ms" d="ms">) into [{"start", "end", "text"}]."""
+    try:
+        root = ET.fromstring(text)
+    except ET.ParseError as e:
+        raise MyException(f"Invalid SRV3 captions: {e}", sys)
+
+    segments = []
+    for p in root.iter("p"):
+        cue = " ".join("".join(p.itertext()).split())
+        if not cue:
+            continue
+        start = int(p.get("t", 0)) / 1000
+        segments.append({
+            "start": round(start, 2),
+            "end": round(start + int(p.get("d", 0)) / 1000, 2),
+            "text": cue,
+        })
+    return segments
+
+
+def parse_captions(text, ext):
+    if ext == "srv3":
+        return parse_srv3(text)
+    if ext == "vtt":
+        return parse_vtt(text)
+    raise MyException(f"Unsupported caption format: {ext}", sys)
+
+
+def speech_segments(segments):
+    return [segment for segment in segments if not NON_SPEECH.match(segment["text"])]
+
+
+def caption_confidence(segments, language, kind="manual", duration=None):
+    """
+    0..1 score of how usable a caption track is as a transcript: share of the
+    video covered by cues, a plausible amount of text per second, and text in
+    the script of `language` (romanized Hindi captions score low), weighted by
+    whether the track is manual or automatic.
+    """
+    segments = speech_segments(segments)
+    if not segments:
+        return 0.0
+
+    covered = sum(max(0.0, segment["end"] - segment["start"]) for segment in segments)
+    text = "".join(segment["text"] for segment in segments)
+    coverage = min(1.0, covered / duration) if duration else 1.0
+
+    chars_per_s = len(text) / covered if covered else 0.0
+    rate_ok = 1.0 if MIN_CHARS_PER_S <= chars_per_s <= MAX_CHARS_PER_S else 0.5
+
+    script = SCRIPTS.get(language)
+    letters = LETTER.findall(text)
+    if script is not None and letters:
+        script_ratio = sum(1 for letter in letters if script.match(letter)) / len(letters)
+    else:
+        script_ratio = 1.0
+
+    # Speech rarely covers the whole video, so 60% coverage already counts as full
+    return round(KIND_WEIGHTS.get(kind, 0.5) * min(1.0, coverage / 0.6) * rate_ok * script_ratio, 3)
+
+
+def caption_tracks(info, languages=None):
+    """
+    Candidate tracks as (language, kind, format dict), manual subtitles first,
+    then automatic captions in the video's own language (machine translations
+    of another language are skipped).
+    """
+    languages = languages or ALLOWED_LANGUAGES
+    for kind, field in (("manual", "subtitles"), ("auto", "automatic_captions")):
+        available = info.get(field) or {}
+        for language in languages:
+            formats = available.get(language) or available.get(f"{language}-orig") or []
+            if kind == "auto":
+                formats = [fmt for fmt in formats if "tlang=" not in (fmt.get("url") or "")]
+            for ext in CAPTION_FORMATS:
+                track = next((fmt for fmt in formats if fmt.get("ext") == ext and fmt.get("url")), None)
+                if track:
+                    yield language, kind, track
+                    break
+
+
+def download_caption(url, timeout=30):
+    from urllib.request import urlopen
+    with urlopen(url, timeout=timeout) as response:
+        return response.read().decode("utf-8")
+
+
+def fetch_captions(info, languages=None, min_confidence=None):
+    """
+    Best usable caption track for a video as {"language", "kind", "confidence",
+    "segments"}, or None when there is none and ASR has to run.
+    """
+    min_confidence = CAPTION_MIN_CONFIDENCE if min_confidence is None else min_confidence
+    best = None
+    for language, kind, track in caption_tracks(info, languages):
+        try:
+            segments = speech_segments(parse_captions(download_caption(track["url"]), track["ext"]))
+        except Exception as e:
+            logging.warning(f"Could not read {kind} {language} captions: {e}")
+            continue
+        confidence = caption_confidence(segments, language, kind, info.get("duration"))
+        logging.info(f"{kind} {language} captions ({track['ext']}): {len(segments)} cues, confidence {confidence}")
+        if best is None or confidence > best["confidence"]:
+            best = {"language": language, "kind": kind, "confidence": confidence, "segments": segments}
+        if confidence >= min_confidence:
+            return best
+
+    if best is None:
+        logging.info("No captions available, falling back to ASR.")
+    else:
+        logging.info(f"Best captions scored {best['confidence']} < {min_confidence}, falling back to ASR.")
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="Caption files named <name>.<lang>.<vtt|srv3>")
+    parser.add_argument("--duration", type=float, help="Video duration in seconds")
+    parser.add_argument("--kind", choices=list(KIND_WEIGHTS), default="manual")
+    args = parser.parse_args(argv)
+
+    for path in args.files:
+        language, ext = path.rsplit(".", 2)[-2:]
+        with open(path, encoding="utf-8") as f:
+            segments = speech_segments(parse_captions(f.read(), ext))
+        confidence = caption_confidence(segments, language, args.kind, args.duration)
+        print(f"{path}: {len(segments)} cues, confidence {confidence}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
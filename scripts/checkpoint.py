@@ -0,0 +1,211 @@
+"""
+Per-stage artifacts for resumable jobs.
+
+A job runs download -> transcribe -> summarize -> save. Each stage writes its
+artifact atomically and records it in a small JSON manifest; the transcribe
+stage also appends every decoded window to a JSONL file as it goes. Running
+the same job again skips the stages already recorded and, inside the
+transcribe stage, the windows already decoded.
+
+Layout (the first three directories are the DVC stage outputs):
+    downloads/raw_audio/<video id>.<ext>               download
+    downloads/transcribed_text/<job id>/segments.jsonl transcribe (per window)
+    downloads/transcribed_text/<job id>/transcript.txt transcribe
+    downloads/transcribed_text/<job id>/transcript.{srt,vtt,segments.json}
+    downloads/summaries/<job id>.txt                   summarize
+    downloads/json_files/<title>_<video id>.json       save
+    downloads/checkpoints/<job id>.json                manifest
+"""
+import os
+import json
+import time
+import tempfile
+from scripts.logger import logging
+from scripts.cache import md5_of_text
+from scripts.subtitles import OUTPUT_FORMATS, write_outputs, read_segments_json
+
+
+STAGES = ("download", "transcribe", "summarize", "save")
+
+
+def job_id_for(*parts):
+    """Stable id for a job, e.g. job_id_for(url, title)."""
+    return md5_of_text("\n".join(str(part) for part in parts))[:16]
+
+
+def atomic_write_text(path, text):
+    """Write `text` to a temporary file next to `path` and rename it into place."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+class PipelineCheckpoint:
+    """
+    Manifest and artifacts of one job. A stage counts as done only if its
+    manifest entry exists, its `key` matches (same audio and models) and its
+    artifact files are still on disk.
+    """
+
+    def __init__(self, job_id, transcript_dir="downloads/transcribed_text", summary_dir="downloads/summaries",
+                 state_dir="downloads/checkpoints"):
+        self.job_id = job_id
+        self.run_dir = os.path.join(transcript_dir, job_id)
+        self.segments_path = os.path.join(self.run_dir, "segments.jsonl")
+        self.transcript_path = os.path.join(self.run_dir, "transcript.txt")
+        self.segments_json_path = os.path.join(self.run_dir, "transcript.segments.json")
+        self.summary_path = os.path.join(summary_dir, f"{job_id}.txt")
+        self.manifest_path = os.path.join(state_dir, f"{job_id}.json")
+        self.stages = {}
+        self.running = {}
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, encoding="utf-8") as f:
+                    manifest = json.load(f)
+                self.stages = manifest.get("stages", {})
+                self.running = manifest.get("running", {})
+            except (OSError, json.JSONDecodeError) as e:
+                logging.warning(f"Ignoring unreadable checkpoint manifest {self.manifest_path}: {e}")
+
+    def artifact(self, stage, key=None):
+        """The manifest entry of a completed stage, or None if it has to run (again)."""
+        entry = self.stages.get(stage)
+        if entry is None or (key is not None and entry.get("key") != key):
+            return None
+        if not all(os.path.exists(path) for path in entry.get("files", [])):
+            return None
+        return entry
+
+    def begin(self, stage, **fields):
+        """Record the settings a stage starts with, so a rerun can resume it with the same ones."""
+        self.running[stage] = fields
+        self._write_manifest()
+
+    def started(self, stage):
+        """Settings recorded by begin() for a stage that has not completed since, or None."""
+        return self.running.get(stage)
+
+    def complete(self, stage, key=None, files=(), **fields):
+        """Record a finished stage; later stages are invalidated since their inputs changed."""
+        for later in STAGES[STAGES.index(stage):]:
+            self.running.pop(later, None)
+        for later in STAGES[STAGES.index(stage) + 1:]:
+            self.stages.pop(later, None)
+        self.stages[stage] = {"key": key, "files": list(files), "completed_at": time.time(), **fields}
+        self._write_manifest()
+        logging.info(f"Checkpoint {self.job_id}: {stage} done")
+
+    def _write_manifest(self):
+        atomic_write_text(self.manifest_path, json.dumps(
+            {"job_id": self.job_id, "stages": self.stages, "running": self.running}, indent=4, ensure_ascii=False
+        ))
+
+    def load_windows(self, key):
+        """
+        Windows already decoded for `key` as {index: record}. Records from a
+        different key (other audio or models) are discarded with the file.
+        """
+        windows = {}
+        if not os.path.exists(self.segments_path):
+            return windows
+        good_lines = []
+        with open(self.segments_path, encoding="utf-8") as f:
+            lines = f.readlines()
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a partial last line; that window is decoded again
+                continue
+            if record.get("key") != key:
+                logging.info(f"Checkpoint {self.job_id}: discarding windows from another run")
+                os.remove(self.segments_path)
+                return {}
+            windows[record["index"]] = record
+            good_lines.append(line)
+        if len(good_lines) != len(lines):
+            # Drop the partial line so new windows are not appended to it
+            atomic_write_text(self.segments_path, "".join(good_lines))
+        if windows:
+            logging.info(f"Checkpoint {self.job_id}: resuming with {len(windows)} windows already decoded")
+        return windows
+
+    def read_windows(self):
+        """
+        Windows on disk as {index: record}, without validating or rewriting the
+        file, so another process can follow a running job.
+        """
+        windows = {}
+        try:
+            with open(self.segments_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # The last line may still be being written
+                        continue
+                    windows[record["index"]] = record
+        except FileNotFoundError:
+            pass
+        return windows
+
+    def record_window(self, key, index, start, end, segments, language=None):
+        """Append one decoded window's timed segments and flush them to disk before moving on."""
+        os.makedirs(self.run_dir, exist_ok=True)
+        record = {"key": key, "index": index, "start": round(start, 2), "end": round(end, 2), "segments": segments,
+                  "language": language}
+        with open(self.segments_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record_windows(self, key, segments, language=None):
+        """Replace the windows with already timed segments (e.g. captions) in one write."""
+        atomic_write_text(self.segments_path, "".join(
+            json.dumps({"key": key, "index": i, "start": segment["start"], "end": segment["end"],
+                        "segments": [segment], "language": language}, ensure_ascii=False) + "\n"
+            for i, segment in enumerate(segments)
+        ))
+
+    def write_transcript(self, text):
+        return atomic_write_text(self.transcript_path, text)
+
+    def write_segments(self, segments, formats=OUTPUT_FORMATS):
+        """Write the normalized segments as transcript.srt / .vtt / .segments.json; returns their paths."""
+        formats = set(formats) | {"json"}  # the segment JSON is what a resumed job reads back
+        return list(write_outputs(segments, self.run_dir, "transcript", sorted(formats)).values())
+
+    def read_segments(self):
+        if not os.path.exists(self.segments_json_path):
+            return None
+        return read_segments_json(self.segments_json_path)
+
+    def write_summary(self, text):
+        return atomic_write_text(self.summary_path, text)
+
+    def summarize_once(self, text, summarizer_model, summarize):
+        """Summary of `text` from the checkpoint, or `summarize(text)` recorded as the summarize stage."""
+        key = f"{md5_of_text(text)}:{summarizer_model}"
+        if self.artifact("summarize", key=key):
+            logging.info(f"Using checkpointed summary: {self.summary_path}")
+            return self.read_text(self.summary_path)
+        summary = summarize(text)
+        self.write_summary(summary)
+        self.complete("summarize", key=key, files=[self.summary_path])
+        return summary
+
+    @staticmethod
+    def read_text(path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
@@ -2,10 +2,26 @@ import os
 import sys
 import shutil
 import re
+import time
+import uuid
+import socket
+import tempfile
+import threading
 import subprocess
-import yt_dlp
+from concurrent.futures import Future
 from scripts.exception import MyException
 from scripts.logger import logging
+from scripts.cache import result_cache, md5_of_text
+from scripts.metrics import metrics, pid_alive
+
+
+# How long a worker waits for another one downloading the same video
+DOWNLOAD_LOCK_TIMEOUT_S = float(os.getenv("DOWNLOAD_LOCK_TIMEOUT_S", 3600))
+# The holder refreshes its lock file this often; a lock not refreshed for
+# LOCK_STALE_S was left behind by a crashed worker
+LOCK_HEARTBEAT_S = float(os.getenv("LOCK_HEARTBEAT_S", 10))
+LOCK_STALE_S = float(os.getenv("LOCK_STALE_S", 60))
+LOCK_POLL_S = 0.5
 
 
 def sanitize_filename(name):
@@ -13,14 +29,174 @@ def sanitize_filename(name):
     return re.sub(r'[\\/*?:"<>|]', "_", name.strip())
 
 
-def get_unique_filename(path):
-    """Generate a unique filename if file already exists."""
-    base, ext = os.path.splitext(path)
-    counter = 1
-    while os.path.exists(path + ".mp3") or os.path.exists(path):
-        path = f"{base}_{counter}{ext}"
-        counter += 1
-    return path
+def media_name(youtube_url, info=None):
+    """
+    File name (without extension) for a video: its id from the metadata, or a
+    hash of the URL. Titles are not unique, so they are never used for files.
+    """
+    video_id = (info or {}).get("id")
+    if video_id:
+        return sanitize_filename(str(video_id))
+    return md5_of_text(youtube_url)[:16]
+
+
+def ffmpeg_location():
+    """
+    Directory holding ffmpeg and ffprobe: FFMPEG_LOCATION if set, otherwise
+    the one found on PATH. None lets yt-dlp search on its own.
+    """
+    location = os.getenv("FFMPEG_LOCATION")
+    if location:
+        return location
+    ffmpeg = shutil.which("ffmpeg")
+    return os.path.dirname(ffmpeg) if ffmpeg else None
+
+
+def ffprobe_binary():
+    location = ffmpeg_location()
+    if location and os.path.isdir(location):
+        return shutil.which("ffprobe", path=location) or "ffprobe"
+    return "ffprobe"
+
+
+class FileLock:
+    """
+    Cross-process lock on `path` + ".lock", created with O_EXCL so exactly one
+    worker holds it. The file records its owner (host, pid and a token) and a
+    heartbeat thread refreshes its mtime every LOCK_HEARTBEAT_S while it is
+    held, however long the download takes. Others poll for up to `timeout`;
+    a lock whose heartbeat is older than LOCK_STALE_S, or whose pid on this
+    host is gone, was left by a crashed worker and is taken over.
+    """
+
+    def __init__(self, path, timeout=DOWNLOAD_LOCK_TIMEOUT_S):
+        self.lock_path = path + ".lock"
+        self.timeout = timeout
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        self._stop = threading.Event()
+        self._heartbeat = None
+
+    def _read_owner(self, path=None):
+        try:
+            with open(path or self.lock_path, encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _is_stale(self, owner):
+        try:
+            age = time.time() - os.path.getmtime(self.lock_path)
+        except FileNotFoundError:
+            return False
+        if age > LOCK_STALE_S:
+            return True
+        host, pid = (owner or "::").split(":")[:2]
+        return host == socket.gethostname() and pid.isdigit() and not pid_alive(int(pid))
+
+    def _take_over(self, owner):
+        """Remove a stale lock unless someone else replaced it meanwhile."""
+        moved = f"{self.lock_path}.{uuid.uuid4().hex}.stale"
+        try:
+            os.rename(self.lock_path, moved)
+        except FileNotFoundError:
+            return
+        if self._read_owner(moved) != owner:
+            # A fresh lock was renamed away by mistake; put it back unless the lock was retaken
+            try:
+                os.link(moved, self.lock_path)
+            except OSError:
+                pass
+        else:
+            logging.warning(f"Removed stale lock held by {owner}: {self.lock_path}")
+        os.remove(moved)
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, self.owner.encode())
+                os.close(fd)
+                break
+            except FileExistsError:
+                pass
+            owner = self._read_owner()
+            if owner is not None and self._is_stale(owner):
+                self._take_over(owner)
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for {self.lock_path} (held by {owner})")
+            time.sleep(LOCK_POLL_S)
+
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._beat, name="lock-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def _beat(self):
+        while not self._stop.wait(LOCK_HEARTBEAT_S):
+            if self._read_owner() != self.owner:
+                logging.warning(f"Lost lock {self.lock_path} to another worker")
+                return
+            try:
+                os.utime(self.lock_path)
+            except FileNotFoundError:
+                return
+
+    def release(self):
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+        # Never remove a lock another worker has taken over
+        if self._read_owner() == self.owner:
+            try:
+                os.remove(self.lock_path)
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class InFlight:
+    """
+    Collapses concurrent calls with the same key in this process onto one
+    execution; the other callers wait for its result (or its exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def run(self, key, fn, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._calls[key] = future
+        if not owner:
+            logging.info(f"Waiting for the download already in flight: {key}")
+            metrics.incr("download_dedup")
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+_in_flight = InFlight()
 
 
 def progress_hook(d):
@@ -33,7 +209,7 @@ def has_audio_stream(filepath):
     """Check if the file has an audio stream using ffprobe."""
     try:
         result = subprocess.run(
-            ['ffprobe', '-v', 'error', '-select_streams', 'a',
+            [ffprobe_binary(), '-v', 'error', '-select_streams', 'a',
              '-show_entries', 'stream=codec_type', '-of', 'csv=p=0', filepath],
             stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
         )
@@ -43,59 +219,91 @@ def has_audio_stream(filepath):
         return False
 
 
-def download_audio(youtube_url, custom_title, output_folder="downloads/raw_audio"):
+# Output formats for download_audio. "wav" and "flac" are written as 16 kHz mono,
+# the format Whisper works in, so the file never has to be decoded again;
+# "original" keeps the downloaded container; "mp3" is the archival format.
+PCM_SAMPLE_RATE = 16000
+AUDIO_FORMATS = ("mp3", "wav", "flac", "original")
+
+
+def build_postprocessors(audio_format):
+    if audio_format == "mp3":
+        return [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'mp3',
+            'preferredquality': '192',
+        }]
+    if audio_format in ("wav", "flac"):
+        return [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': audio_format,
+        }]
+    return []
+
+
+def fetch_info(youtube_url):
+    """Single metadata pass for a video; the result can be passed to download_audio."""
+    import yt_dlp
+    # noplaylist: a watch?v=X&list=Y URL describes video X, not the whole playlist
+    with yt_dlp.YoutubeDL({'quiet': True, 'format': 'bestaudio/best', 'noplaylist': True}) as ydl:
+        return ydl.extract_info(youtube_url, download=False)
+
+
+@metrics.timed("download_audio")
+def download_audio(youtube_url, custom_title, output_folder="downloads/raw_audio", audio_format="mp3",
+                   info=None):
+    """
+    Download a video's audio to <output_folder>/<video id>.<ext> and return the path.
+    Concurrent calls for the same URL in this process share one download, and
+    workers in other processes wait on the file lock instead of downloading again.
+    """
+    key = (youtube_url, os.path.abspath(output_folder), audio_format)
+    return _in_flight.run(key, _download_audio, youtube_url, custom_title, output_folder, audio_format, info)
+
+
+def _download_audio(youtube_url, custom_title, output_folder, audio_format, info):
+    # Imported here so that importing this module stays cheap
+    import yt_dlp
+
     try:
+        if audio_format not in AUDIO_FORMATS:
+            raise ValueError(f"Unsupported audio format: {audio_format}. Choose from {AUDIO_FORMATS}.")
+
         if not youtube_url or not youtube_url.startswith("http"):
             logging.error("Invalid YouTube URL provided.")
             raise ValueError("Invalid YouTube URL. Please provide a valid URL.")
 
         os.makedirs(output_folder, exist_ok=True)
 
-        safe_title = sanitize_filename(custom_title)
-        output_path = os.path.join(output_folder, f"{safe_title}")
-        output_path = get_unique_filename(output_path)
-
         if not os.access(output_folder, os.W_OK):
             logging.error(f"Output folder is not writable: {output_folder}")
             raise PermissionError(f"Cannot write to output folder: {output_folder}")
 
         # STEP 1: Pre-check if the video has audio stream using metadata
-        with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
-            info = ydl.extract_info(youtube_url, download=False)
-            if 'acodec' in info and info['acodec'] == 'none':
-                logging.warning("Video has no audio stream, skipping download.")
-                raise MyException("The video has no audio stream to extract.", sys)
-
-        # STEP 2: yt-dlp options to download and convert to mp3
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': output_path + ".%(ext)s",
-            'ffmpeg_location': r'C:\ffmpeg\bin',
-            'prefer_ffmpeg': True,
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-            'progress_hooks': [progress_hook],
-            'quiet': False,
-            'noplaylist': True,
-        }
+        if info is None:
+            info = fetch_info(youtube_url)
+        if 'acodec' in info and info['acodec'] == 'none':
+            logging.warning("Video has no audio stream, skipping download.")
+            raise MyException("The video has no audio stream to extract.", sys)
 
-        # STEP 3: Download and extract
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(youtube_url, download=True)
+        name = media_name(youtube_url, info)
+        ext = info.get('ext', 'webm') if audio_format == "original" else audio_format
+        final_path = os.path.join(output_folder, f"{name}.{ext}")
+        logging.info(f"Audio for '{custom_title}' goes to {final_path}")
 
-        # Final MP3 file path
-        final_path = f"{os.path.splitext(output_path)[0]}.mp3"
+        # One worker per file; the others wait here and then reuse its result
+        with FileLock(final_path):
+            if os.path.exists(final_path) and has_audio_stream(final_path):
+                logging.info(f"Audio already downloaded: {final_path}")
+                return final_path
 
-        # STEP 4: Validate the resulting mp3 file (instead of webm)
-        if not has_audio_stream(final_path):
-            logging.warning("Converted MP3 has no audio stream.")
-            raise MyException("The extracted audio file has no valid audio stream.", sys)
-
-        logging.info(f"YouTube audio downloaded successfully: {final_path}")
-        return final_path
+            # Everything is written in a private directory and renamed into place,
+            # so a file at final_path is always complete
+            work_dir = tempfile.mkdtemp(dir=output_folder, prefix=f".{name}.")
+            try:
+                return _fetch_into(yt_dlp, youtube_url, info, audio_format, ext, name, work_dir, final_path)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
 
     except yt_dlp.utils.DownloadError as e:
         logging.error(f"Download error: {e}")
@@ -105,6 +313,59 @@ def download_audio(youtube_url, custom_title, output_folder="downloads/raw_audio
         raise MyException(str(e), sys)
 
 
+def _fetch_into(yt_dlp, youtube_url, info, audio_format, ext, name, work_dir, final_path):
+    """Download (or take from the cache) into `work_dir`, validate and move to `final_path`."""
+    # Reuse a previous download of the same video
+    cache_key = f"download:{info.get('id') or youtube_url}:{audio_format}"
+    cached_path = result_cache.get_file(cache_key, os.path.join(work_dir, f"{name}.{ext}"))
+    if cached_path:
+        os.replace(cached_path, final_path)
+        logging.info(f"Reusing cached audio for {youtube_url}: {final_path}")
+        return final_path
+
+    # STEP 2: yt-dlp options to download and convert to the requested format
+    location = ffmpeg_location()
+    if location is None:
+        logging.warning("ffmpeg not found on PATH; set FFMPEG_LOCATION to its directory.")
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'outtmpl': os.path.join(work_dir, name + ".%(ext)s"),
+        'prefer_ffmpeg': True,
+        'postprocessors': build_postprocessors(audio_format),
+        'progress_hooks': [progress_hook],
+        'quiet': False,
+        'noplaylist': True,
+    }
+    if location:
+        ydl_opts['ffmpeg_location'] = location
+    if audio_format in ("wav", "flac"):
+        # Resample and downmix in the same ffmpeg pass that extracts the audio
+        ydl_opts['postprocessor_args'] = {
+            'extractaudio': ['-ar', str(PCM_SAMPLE_RATE), '-ac', '1'],
+        }
+
+    # STEP 3: Download and extract, reusing the metadata from step 1
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.process_ie_result(info, download=True)
+
+    # Final audio file path
+    if audio_format == "original":
+        ext = info.get('ext', ext)
+        final_path = f"{os.path.splitext(final_path)[0]}.{ext}"
+    downloaded_path = os.path.join(work_dir, f"{name}.{ext}")
+
+    # STEP 4: Validate the resulting audio file
+    if not has_audio_stream(downloaded_path):
+        logging.warning("Downloaded audio has no audio stream.")
+        raise MyException("The extracted audio file has no valid audio stream.", sys)
+
+    result_cache.put_file(cache_key, downloaded_path)
+    os.replace(downloaded_path, final_path)
+
+    logging.info(f"YouTube audio downloaded successfully: {final_path}")
+    return final_path
+
+
 # if __name__ == "__main__":
 #     youtube_url = input("Enter YouTube URL: ")
 #     custom_title = input("Enter custom title: ")
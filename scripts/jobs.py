@@ -0,0 +1,435 @@
+import json
+import os
+import sys
+import time
+import uuid
+import atexit
+import sqlite3
+import threading
+import multiprocessing
+from scripts.exception import MyException
+from scripts.logger import logging
+from scripts.metrics import pid_alive
+
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# A worker that exits sooner than this after starting counts as crashing on
+# startup; replacements for crashing workers are delayed exponentially
+WORKER_MIN_UPTIME_S = float(os.getenv("WORKER_MIN_UPTIME_S", 30))
+RESTART_BACKOFF_S = float(os.getenv("WORKER_RESTART_BACKOFF_S", 1))
+RESTART_BACKOFF_MAX_S = float(os.getenv("WORKER_RESTART_BACKOFF_MAX_S", 300))
+# A running job whose worker vanished (web process restarted or killed) goes back
+# to pending and resumes from its checkpoints, up to this many starts in total
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class JobStore:
+    """
+    Interface for job storage backends.
+    A backend must be safe to use from several processes at once, because
+    the web workers and the job workers all read and write the same jobs.
+    """
+
+    def create(self, payload, max_pending=None):
+        """Add a pending job; raises QueueFullError if `max_pending` jobs are already waiting."""
+        raise NotImplementedError
+
+    def claim(self, worker_pid):
+        """Atomically move the oldest pending job to running and return it."""
+        raise NotImplementedError
+
+    def finish(self, job_id, result):
+        raise NotImplementedError
+
+    def fail(self, job_id, error):
+        raise NotImplementedError
+
+    def cancel(self, job_id):
+        raise NotImplementedError
+
+    def requeue(self, job_id, worker_pid):
+        """Put a running job of a worker that is gone back to pending."""
+        raise NotImplementedError
+
+    def get(self, job_id):
+        raise NotImplementedError
+
+    def count(self, status):
+        raise NotImplementedError
+
+    def running_jobs(self):
+        raise NotImplementedError
+
+
+class SQLiteJobStore(JobStore):
+    """Job store backed by a local SQLite file, so no external broker is needed."""
+
+    def __init__(self, db_path="downloads/jobs.sqlite3"):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    worker_pid INTEGER,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "attempts" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def _connect(self):
+        # A fresh connection per call keeps the store usable across threads and processes
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _row_to_job(self, row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def create(self, payload, max_pending=None):
+        job_id = uuid.uuid4().hex
+        conn = self._connect()
+        try:
+            # Count and insert in one write transaction, so web workers submitting
+            # at the same time cannot all pass the capacity check
+            conn.execute("BEGIN IMMEDIATE")
+            if max_pending is not None:
+                pending = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (PENDING,)).fetchone()[0]
+                if pending >= max_pending:
+                    conn.execute("ROLLBACK")
+                    raise QueueFullError("Too many jobs are waiting. Please try again later.")
+            conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, PENDING, json.dumps(payload, ensure_ascii=False), time.time())
+            )
+            conn.execute("COMMIT")
+        except QueueFullError:
+            raise
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return job_id
+
+    def claim(self, worker_pid):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (PENDING,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_pid = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (RUNNING, worker_pid, time.time(), row["id"])
+            )
+            conn.execute("COMMIT")
+            job = self._row_to_job(row)
+            job["status"] = RUNNING
+            job["worker_pid"] = worker_pid
+            job["attempts"] += 1
+            return job
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _set_finished(self, job_id, status, result=None, error=None):
+        with self._connect() as conn:
+            # Never overwrite a job that was cancelled while it was running
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? "
+                "WHERE id = ? AND status = ?",
+                (status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+                 error, time.time(), job_id, RUNNING)
+            )
+
+    def finish(self, job_id, result):
+        self._set_finished(job_id, DONE, result=result)
+
+    def fail(self, job_id, error):
+        self._set_finished(job_id, FAILED, error=str(error))
+
+    def cancel(self, job_id):
+        """Cancel a pending job immediately, or flag a running job for its pool to stop."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, PENDING)
+            )
+            if cur.rowcount:
+                return True
+            cur = conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+                (job_id, RUNNING)
+            )
+            return bool(cur.rowcount)
+
+    def requeue(self, job_id, worker_pid):
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = ?, worker_pid = NULL, started_at = NULL "
+                "WHERE id = ? AND status = ? AND worker_pid = ?",
+                (PENDING, job_id, RUNNING, worker_pid)
+            )
+            return bool(cur.rowcount)
+
+    def mark_cancelled(self, job_id):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, RUNNING)
+            )
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row)
+
+    def count(self, status):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def running_jobs(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+
+def _claim_loop(store, handler, poll_interval):
+    pid = os.getpid()
+    parent = multiprocessing.parent_process()
+    while True:
+        if parent is not None and not parent.is_alive():
+            # The web process was killed without shutdown(); its replacement
+            # starts its own workers and requeues the jobs this one leaves behind
+            logging.warning(f"Job worker {pid} stopping: its parent process exited")
+            return
+        try:
+            job = store.claim(pid)
+        except Exception as e:
+            logging.error(f"Job worker {pid} failed to claim a job: {e}")
+            time.sleep(poll_interval)
+            continue
+
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+
+        logging.info(f"Job {job['id']} started on worker {pid}")
+        try:
+            result = handler(**job["payload"])
+            store.finish(job["id"], result)
+            logging.info(f"Job {job['id']} finished")
+        except Exception as e:
+            logging.error(f"Job {job['id']} failed: {e}")
+            store.fail(job["id"], e)
+
+
+def _worker_loop(store, handler, poll_interval, threads=1):
+    """Run in each worker process: claim pending jobs and run up to `threads` of them at once."""
+    logging.info(f"Job worker started (pid={os.getpid()}, threads={threads})")
+    runners = [
+        threading.Thread(target=_claim_loop, args=(store, handler, poll_interval), daemon=True)
+        for _ in range(threads - 1)
+    ]
+    for runner in runners:
+        runner.start()
+    _claim_loop(store, handler, poll_interval)
+    for runner in runners:
+        runner.join()
+
+
+class JobQueue:
+    """
+    Bounded pool of worker processes that execute jobs from a JobStore.
+
+    `handler` must be an importable module-level function; it is called with
+    the job payload as keyword arguments and its return value is stored as the
+    job result. Submissions beyond `max_pending` waiting jobs raise QueueFullError.
+    """
+
+    def __init__(self, handler, store=None, num_workers=2, max_pending=20, poll_interval=0.5,
+                 threads_per_worker=1):
+        self.handler = handler
+        self.store = store or SQLiteJobStore()
+        self.num_workers = max(1, num_workers)
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval
+        self.threads_per_worker = max(1, threads_per_worker)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._workers = {}
+        self._started_at = {}
+        self._cancelled_pids = set()
+        self._crashes = 0
+        self._respawn_at = 0.0
+        self._lock = threading.Lock()
+        self._monitor = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._monitor is not None:
+                return
+            self._recover_orphans()
+            for _ in range(self.num_workers):
+                self._spawn_worker()
+            self._monitor = threading.Thread(target=self._monitor_loop, daemon=True)
+            self._monitor.start()
+            atexit.register(self.shutdown)
+        logging.info(f"Job queue started with {self.num_workers} workers")
+
+    def _spawn_worker(self):
+        process = self._ctx.Process(
+            target=_worker_loop,
+            args=(self.store, self.handler, self.poll_interval, self.threads_per_worker),
+            # Not a daemon, so a job may start its own process pool (segmented transcription);
+            # shutdown() terminates the workers instead.
+            daemon=False
+        )
+        process.start()
+        self._workers[process.pid] = process
+        self._started_at[process.pid] = time.monotonic()
+
+    def _monitor_loop(self):
+        """Stop workers whose job was cancelled and keep the pool at full size."""
+        while not self._stopped.is_set():
+            try:
+                self._recover_orphans()
+                for job in self.store.running_jobs():
+                    process = self._workers.get(job["worker_pid"])
+                    if process is None:
+                        continue
+                    if job["cancel_requested"]:
+                        logging.info(f"Cancelling running job {job['id']} (worker {process.pid})")
+                        self._cancelled_pids.add(process.pid)
+                        process.terminate()
+                        process.join(timeout=5)
+                        self.store.mark_cancelled(job["id"])
+                        # Other jobs running in the same process were stopped with it
+                        for other in self.store.running_jobs():
+                            if other["worker_pid"] == process.pid:
+                                self.store.fail(other["id"], "Worker restarted to cancel another job.")
+                    elif not process.is_alive():
+                        self.store.fail(job["id"], "Worker process exited unexpectedly.")
+
+                with self._lock:
+                    self._replace_dead_workers()
+            except Exception as e:
+                logging.error(f"Job monitor error: {e}")
+            self._stopped.wait(self.poll_interval)
+
+    def _recover_orphans(self):
+        """
+        Requeue running jobs whose worker is gone and is not one of this queue's:
+        left by a web process that was restarted or killed, or by shutdown().
+        They resume from their checkpoints; after JOB_MAX_ATTEMPTS starts they fail.
+        Jobs of workers that belong to other live queues are left alone.
+        """
+        for job in self.store.running_jobs():
+            pid = job["worker_pid"]
+            if pid in self._workers or (pid is not None and pid_alive(pid)):
+                continue
+            if job["cancel_requested"]:
+                self.store.mark_cancelled(job["id"])
+            elif job.get("attempts", 0) >= JOB_MAX_ATTEMPTS:
+                logging.error(f"Job {job['id']} lost its worker {pid} {job['attempts']} times, giving up")
+                self.store.fail(job["id"], "Worker process exited unexpectedly.")
+            elif self.store.requeue(job["id"], pid):
+                logging.warning(f"Job {job['id']} lost its worker {pid}; queued again to resume")
+
+    def _replace_dead_workers(self):
+        """Respawn exited workers, backing off while they keep dying right after startup."""
+        now = time.monotonic()
+        for pid, process in list(self._workers.items()):
+            if process.is_alive():
+                continue
+            del self._workers[pid]
+            uptime = now - self._started_at.pop(pid, now)
+            if pid in self._cancelled_pids:
+                # Stopped on purpose to cancel a job
+                self._cancelled_pids.discard(pid)
+            elif uptime < WORKER_MIN_UPTIME_S:
+                self._crashes += 1
+                delay = min(RESTART_BACKOFF_MAX_S, RESTART_BACKOFF_S * 2 ** (self._crashes - 1))
+                self._respawn_at = max(self._respawn_at, now + delay)
+                logging.error(f"Worker {pid} exited with code {process.exitcode} after {uptime:.1f}s "
+                              f"({self._crashes} crashes in a row); next restart in {delay:.0f}s")
+            else:
+                self._crashes = 0
+                logging.warning(f"Worker {pid} exited with code {process.exitcode}, restarting it")
+
+        if now < self._respawn_at:
+            return
+        for _ in range(self.num_workers - len(self._workers)):
+            self._spawn_worker()
+
+    def submit(self, **payload):
+        """Queue a job and return its id without waiting for it to run."""
+        try:
+            job_id = self.store.create(payload, max_pending=self.max_pending)
+        except QueueFullError:
+            logging.warning("Job queue is full, rejecting submission.")
+            raise
+        except Exception as e:
+            logging.error(f"Failed to create job: {e}")
+            raise MyException(str(e), sys)
+        self.start()
+        logging.info(f"Job {job_id} queued")
+        return job_id
+
+    def status(self, job_id):
+        return self.store.get(job_id)
+
+    def cancel(self, job_id):
+        return self.store.cancel(job_id)
+
+    def shutdown(self):
+        """Stop the workers and requeue the jobs they were running."""
+        self._stopped.set()
+        with self._lock:
+            for process in self._workers.values():
+                process.terminate()
+            for process in self._workers.values():
+                process.join(timeout=5)
+            self._workers.clear()
+            self._monitor = None
+            try:
+                self._recover_orphans()
+            except Exception as e:
+                logging.error(f"Failed to requeue running jobs on shutdown: {e}")
@@ -0,0 +1,58 @@
+"""
+Spoken-language routing.
+
+Whisper's language detection runs once per file on the first windows of the
+already-decoded samples. Its probabilities are restricted to the languages we
+expect in the catalogue (LANGUAGES, default "hi,mr,en"); when no language is
+clearly ahead, as in code-mixed speech, the job falls back to DEFAULT_LANGUAGE.
+The chosen language then drives decoding, text normalization and whether the
+summarizer is used.
+"""
+import os
+from scripts.logger import logging
+
+
+DEFAULT_LANGUAGE = os.getenv("DEFAULT_LANGUAGE", "hi")
+ALLOWED_LANGUAGES = [lang.strip() for lang in os.getenv("LANGUAGES", "hi,mr,en").split(",") if lang.strip()]
+MIN_LANGUAGE_PROB = float(os.getenv("MIN_LANGUAGE_PROB", 0.5))
+# 30-second windows from the start of the audio used for detection
+LANGUAGE_DETECT_WINDOWS = int(os.getenv("LANGUAGE_DETECT_WINDOWS", 2))
+
+# Languages csebuetnlp/mT5_multilingual_XLSum was trained on, as Whisper language codes
+SUMMARIZER_LANGUAGES = {
+    "am", "ar", "az", "bn", "cy", "en", "es", "fa", "fr", "gu", "ha", "hi", "id", "ja", "ko", "mr",
+    "my", "ne", "pa", "ps", "pt", "ru", "si", "so", "sr", "sw", "ta", "te", "th", "tr", "uk", "ur",
+    "uz", "vi", "yo", "zh",
+}
+
+
+def requested_language():
+    """Language forced with WHISPER_LANGUAGE, or None to detect it per file."""
+    language = os.getenv("WHISPER_LANGUAGE", "auto")
+    return None if language == "auto" else language
+
+
+def choose_language(probs, allowed=None, min_prob=None):
+    """
+    Pick a language from Whisper's {code: probability} map.
+    Returns (language, probability within the allowed set).
+    """
+    allowed = allowed or ALLOWED_LANGUAGES
+    min_prob = MIN_LANGUAGE_PROB if min_prob is None else min_prob
+
+    candidates = {lang: probs.get(lang, 0.0) for lang in allowed}
+    total = sum(candidates.values())
+    if total <= 0:
+        logging.warning(f"No allowed language detected, using {DEFAULT_LANGUAGE}")
+        return DEFAULT_LANGUAGE, 0.0
+
+    language = max(candidates, key=candidates.get)
+    prob = candidates[language] / total
+    if prob < min_prob:
+        logging.info(f"Language unclear ({language} at {prob:.2f}), treating as code-mixed: {DEFAULT_LANGUAGE}")
+        return DEFAULT_LANGUAGE, prob
+    return language, prob
+
+
+def can_summarize(language):
+    return language in SUMMARIZER_LANGUAGES
@@ -13,17 +13,31 @@ backup_count = 3
 
 # Construct log dir file
 log_dir_path = os.path.join(from_root(), log_dir)  # Call from_root() if it's a function
-os.makedirs(log_dir_path, exist_ok=True)
 log_file_path = os.path.join(log_dir_path, log_file)
 
+
+class LazyRotatingFileHandler(RotatingFileHandler):
+    """Rotating file handler that creates the log directory and file on the first record."""
+
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, delay=True, **kwargs)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
 def config_logger():
     logger = logging.getLogger()
+    # Importing this module more than once (or from several entry points) must not duplicate handlers
+    if getattr(logger, "_scripts_configured", False):
+        return
     logger.setLevel(logging.DEBUG)
 
     formatter = logging.Formatter("[%(asctime)s] %(name)s - %(levelname)s - %(message)s")
 
     # File handler
-    file_handler = RotatingFileHandler(log_file_path, maxBytes=max_log_size, backupCount=backup_count)
+    file_handler = LazyRotatingFileHandler(log_file_path, maxBytes=max_log_size, backupCount=backup_count)
     file_handler.setFormatter(formatter)
     file_handler.setLevel(logging.DEBUG)
 
@@ -35,6 +49,7 @@ def config_logger():
     # Add handlers to logger
     logger.addHandler(file_handler)
     logger.addHandler(console_handler)
+    logger._scripts_configured = True
 
-# Configure the logger
+# Configure the logger (no files are touched until something is logged)
 config_logger()
@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import glob
+import tempfile
+import threading
+import functools
+from contextlib import contextmanager
+from scripts.logger import logging
+
+
+def current_rss_bytes():
+    """Resident set size of this process, read from /proc when available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+            # ru_maxrss is the peak, in KB on Linux and bytes on macOS
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except Exception:
+            return 0
+
+
+def pid_alive(pid):
+    """Whether a process with this pid exists on this host."""
+    if os.name == "nt":
+        # os.kill would terminate the process on Windows; assume it is alive
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Metrics:
+    """
+    Lightweight per-process stage timers, counters and RSS snapshots.
+
+    `stage()` and the counters are no-ops unless METRICS_ENABLED=1.
+    When enabled, each finished stage is logged as a JSON line, and after every
+    stage or counter update this process's totals are written to METRICS_DIR,
+    so the /metrics endpoint can aggregate the job workers as well as the web process.
+    """
+
+    def __init__(self, enabled=None, metrics_dir=None):
+        if enabled is None:
+            enabled = os.getenv("METRICS_ENABLED", "0") == "1"
+        self.enabled = enabled
+        self.metrics_dir = metrics_dir or os.getenv("METRICS_DIR", "downloads/metrics")
+        self._lock = threading.Lock()
+        # Serializes snapshot and rename, so an older snapshot never replaces a newer one
+        self._dump_lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+
+    @contextmanager
+    def stage(self, name, **labels):
+        if not self.enabled:
+            yield
+            return
+
+        rss_before = current_rss_bytes()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            rss_after = current_rss_bytes()
+            self._record_stage(name, elapsed, rss_after, error)
+            logging.info(json.dumps({
+                "event": "stage", "stage": name, "seconds": round(elapsed, 4),
+                "rss_before_bytes": rss_before, "rss_after_bytes": rss_after,
+                "error": error, **labels
+            }, ensure_ascii=False))
+
+    def timed(self, name):
+        """Decorator form of `stage`."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def incr(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        # Counters bumped outside any stage (cache, download dedup) must reach /metrics too
+        self._dump()
+
+    def _record_stage(self, name, elapsed, rss, error):
+        with self._lock:
+            stats = self.stages.setdefault(name, {"count": 0, "seconds": 0.0, "errors": 0, "rss_bytes": 0})
+            stats["count"] += 1
+            stats["seconds"] += elapsed
+            stats["rss_bytes"] = rss
+            if error:
+                stats["errors"] += 1
+        self._dump()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "stages": {name: dict(stats) for name, stats in self.stages.items()},
+                "counters": dict(self.counters),
+            }
+
+    def _dump(self):
+        try:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            with self._dump_lock:
+                fd, tmp_path = tempfile.mkstemp(dir=self.metrics_dir, suffix=".tmp")
+                with os.fdopen(fd, "w") as f:
+                    json.dump(self.snapshot(), f)
+                os.replace(tmp_path, os.path.join(self.metrics_dir, f"{os.getpid()}.json"))
+        except Exception as e:
+            logging.warning(f"Failed to write metrics snapshot: {e}")
+
+    def collect(self):
+        """
+        Merge the snapshots of all live processes sharing METRICS_DIR. Snapshots
+        of exited processes, such as restarted job workers, are deleted.
+        """
+        snapshots = []
+        for path in glob.glob(os.path.join(self.metrics_dir, "*.json")):
+            try:
+                with open(path) as f:
+                    snap = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not pid_alive(snap["pid"]):
+                try:
+                    os.remove(path)
+                    logging.info(f"Removed metrics snapshot of exited process {snap['pid']}")
+                except OSError:
+                    pass
+                continue
+            snapshots.append(snap)
+        if not any(snap["pid"] == os.getpid() for snap in snapshots):
+            snapshots.append(self.snapshot())
+        return snapshots
+
+    def render_prometheus(self):
+        """Render all processes' metrics in the Prometheus text exposition format."""
+        snapshots = self.collect()
+        stage_metrics = [
+            ("pipeline_stage_seconds_total", "counter", "seconds", "Total time spent in each pipeline stage."),
+            ("pipeline_stage_runs_total", "counter", "count", "Number of times each pipeline stage ran."),
+            ("pipeline_stage_errors_total", "counter", "errors", "Number of times each pipeline stage failed."),
+            ("pipeline_stage_rss_bytes", "gauge", "rss_bytes", "Process RSS at the end of the last run of each stage."),
+        ]
+
+        lines = []
+        for metric, kind, field, help_text in stage_metrics:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            for snap in snapshots:
+                for name, stats in snap["stages"].items():
+                    lines.append(f'{metric}{{stage="{name}",pid="{snap["pid"]}"}} {stats[field]}')
+
+        lines += ["# HELP pipeline_events_total Pipeline event counters.", "# TYPE pipeline_events_total counter"]
+        for snap in snapshots:
+            for name, value in snap["counters"].items():
+                lines.append(f'pipeline_events_total{{name="{name}",pid="{snap["pid"]}"}} {value}')
+
+        lines.append(f"process_resident_memory_bytes {current_rss_bytes()}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
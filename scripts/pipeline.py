@@ -0,0 +1,222 @@
+"""
+Resumable video pipeline: download -> transcribe -> summarize -> save.
+
+Every stage persists its artifact (see scripts.checkpoint) before the next one
+starts, so a job that fails midway restarts from the last completed stage, or
+from the last decoded window inside the transcription. The job is identified
+by URL and title. Each DVC stage in dvc.yaml runs this module up to its stage:
+
+Usage:
+    python -m scripts.pipeline --url https://www.youtube.com/watch?v=... --title "Lecture 1"
+    python -m scripts.pipeline --url ... --title ... --until transcribe
+"""
+import os
+import sys
+import argparse
+from scripts.exception import MyException
+from scripts.logger import logging
+from scripts.checkpoint import STAGES, PipelineCheckpoint, job_id_for
+
+
+TRANSCRIPT_DIR = "downloads/transcribed_text"
+
+
+def checkpoint_for(video_title, url):
+    return PipelineCheckpoint(job_id_for(url, video_title), transcript_dir=TRANSCRIPT_DIR)
+
+
+def run_download(checkpoint, video_title, url, audio_format="wav", info=None):
+    from scripts.download_audio import download_audio
+
+    done = checkpoint.artifact("download", key=f"{url}:{audio_format}")
+    if done:
+        logging.info(f"Using checkpointed audio: {done['audio_path']}")
+        return done["audio_path"]
+
+    logging.info(f"Downloading audio for: {video_title}")
+    audio_path = download_audio(url, video_title, audio_format=audio_format, info=info)
+    if not os.path.exists(audio_path):
+        raise FileNotFoundError("Failed to download audio.")
+    checkpoint.complete("download", key=f"{url}:{audio_format}", files=[audio_path], audio_path=audio_path)
+    return audio_path
+
+
+def run_captions(checkpoint, info):
+    """
+    Use the video's captions as its transcript when they look usable. Records
+    the transcribe stage and returns its manifest entry, or None to fall back to ASR.
+    """
+    from scripts.captions import fetch_captions
+    from scripts.postprocess import clean_segments, end_transcript
+    from scripts.transcribe import TRANSCRIPT_FORMATS
+
+    captions = fetch_captions(info)
+    if captions is None:
+        return None
+
+    language = captions["language"]
+    segments = list(clean_segments(captions["segments"], lang=language))
+    transcript = end_transcript(" ".join(segment["text"] for segment in segments), language)
+    if not transcript:
+        return None
+
+    key = f"captions:{info.get('id')}:{language}:{captions['kind']}"
+    checkpoint.record_windows(key, captions["segments"], language=language)
+    checkpoint.write_transcript(transcript)
+    output_paths = checkpoint.write_segments(segments, TRANSCRIPT_FORMATS)
+    checkpoint.complete("transcribe", key=key, files=[checkpoint.transcript_path] + output_paths, model_config={
+        "source": "captions",
+        "captions": captions["kind"],
+        "confidence": captions["confidence"],
+        "language": language,
+    })
+    logging.info(f"Using {captions['kind']} {language} captions instead of ASR")
+    return checkpoint.artifact("transcribe")
+
+
+def is_captions(transcribed):
+    """Whether a transcribe stage entry was recorded by run_captions."""
+    return (transcribed.get("model_config") or {}).get("source") == "captions"
+
+
+def run_save(checkpoint, video_title, url, transcript, summary, model_config=None, segments=None):
+    from scripts.save_json import save_transcript_and_summary
+
+    key = job_id_for(transcript, summary)
+    done = checkpoint.artifact("save", key=key)
+    if done:
+        logging.info(f"Transcript already saved: {done.get('json_path')}")
+        return done.get("json_path")
+
+    logging.info("Saving transcript and summary to JSON...")
+    json_path = save_transcript_and_summary(video_title, transcript, summary, url=url, model_config=model_config,
+                                            segments=segments)
+    checkpoint.complete("save", key=key, files=[json_path] if json_path else [], json_path=json_path)
+    return json_path
+
+
+def run_pipeline(video_title, url, make_transcriber, audio_format="wav", segmented=False, batched=False,
+                 until="save", captions_first=False):
+    """
+    Run the job up to and including `until`, skipping checkpointed stages.
+    `make_transcriber(audio_path, model_size=None, backend=None)` returns a
+    HindiTranscriber and is only called when a stage still needs the models;
+    a partly decoded transcript passes the model size and backend it was started with. With `captions_first`, usable captions
+    replace the download and Whisper stages (see run_captions).
+    Returns (transcript, summary); either is None when `until` stops before it is produced.
+    """
+    if until not in STAGES:
+        raise MyException(f"Unknown stage: {until}. Choose from {STAGES}.", sys)
+    if not video_title or not url:
+        raise ValueError("Video title and URL are required.")
+
+    checkpoint = checkpoint_for(video_title, url)
+
+    transcribed = checkpoint.artifact("transcribe")
+    if transcribed and is_captions(transcribed) and not captions_first:
+        logging.info("Captions-first is off; transcribing with Whisper instead of the checkpointed captions")
+        transcribed = None
+    info = None
+    if captions_first and not transcribed:
+        from scripts.download_audio import fetch_info
+        # The same metadata is reused by the download if the captions are not good enough
+        info = fetch_info(url)
+        transcribed = run_captions(checkpoint, info)
+
+    if transcribed and is_captions(transcribed):
+        from scripts.transcribe import (DEFAULT_SUMMARIZER, SUMMARIZE_IN_SUBPROCESS, model_registry,
+                                        summarize_text, summarize_in_subprocess)
+
+        transcript = checkpoint.read_text(checkpoint.transcript_path)
+        if until in ("download", "transcribe"):
+            return transcript, None
+        model_config = transcribed["model_config"]
+
+        def summarize(text):
+            if SUMMARIZE_IN_SUBPROCESS:
+                return summarize_in_subprocess(DEFAULT_SUMMARIZER, text, language=model_config["language"])
+            return summarize_text(model_registry.get_summarizer(), text, language=model_config["language"])
+
+        summary = checkpoint.summarize_once(transcript, DEFAULT_SUMMARIZER, summarize)
+        if until == "summarize":
+            return transcript, summary
+        run_save(checkpoint, video_title, url, transcript, summary, model_config=model_config,
+                 segments=checkpoint.read_segments())
+        return transcript, summary
+
+    audio_path = run_download(checkpoint, video_title, url, audio_format, info=info)
+    if until == "download":
+        return None, None
+
+    # Completing a stage clears the ones after it, so a recorded summary always
+    # belongs to the recorded transcript and the models need not be loaded
+    transcribed = checkpoint.artifact("transcribe")
+    if transcribed and is_captions(transcribed):
+        # Replaced by the Whisper transcript below
+        transcribed = None
+    if transcribed and (until == "transcribe" or checkpoint.artifact("summarize")):
+        transcript = checkpoint.read_text(checkpoint.transcript_path)
+        summary = checkpoint.read_text(checkpoint.summary_path) if until != "transcribe" else None
+        model_config = transcribed.get("model_config")
+        segments = checkpoint.read_segments()
+    else:
+        logging.info("Initializing HindiTranscriber...")
+        # Decoded windows are keyed by their model, so a resumed transcript keeps
+        # it even if the resources would now suggest another size
+        resume = checkpoint.started("transcribe") if checkpoint.read_windows() else None
+        if resume:
+            logging.info(f"Resuming transcription with {resume['backend']} {resume['model_size']}")
+        # Closing releases the models, so idle ones can be unloaded under the RSS budget
+        with make_transcriber(audio_path, **(resume or {})) as transcriber:
+            if until == "transcribe":
+                transcript = transcriber.transcribe_audio(
+                    TRANSCRIPT_DIR, audio_path, segmented=segmented, batched=batched, checkpoint=checkpoint
+                )
+                return transcript, None
+
+            logging.info("Processing transcription...")
+            transcript, summary = transcriber.process_audio(
+                output_dir=TRANSCRIPT_DIR, audio_file=audio_path, segmented=segmented, batched=batched,
+                checkpoint=checkpoint
+            )
+            # Read after transcription, once the language is known
+            model_config = transcriber.model_config()
+            segments = transcriber.segments
+
+    if until == "transcribe":
+        return transcript, None
+    if until == "summarize":
+        return transcript, summary
+
+    run_save(checkpoint, video_title, url, transcript, summary, model_config=model_config, segments=segments)
+    return transcript, summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--title", required=True)
+    parser.add_argument("--until", choices=STAGES, default="save")
+    parser.add_argument("--model", default=os.getenv("WHISPER_MODEL_SIZE", "base"))
+    parser.add_argument("--audio-format", default=os.getenv("AUDIO_FORMAT", "wav"))
+    parser.add_argument("--segmented", action="store_true")
+    parser.add_argument("--captions-first", action="store_true", default=os.getenv("CAPTIONS_FIRST", "0") == "1",
+                        help="Use the video's captions instead of Whisper when they look usable")
+    args = parser.parse_args(argv)
+
+    def make_transcriber(audio_path, model_size=None, backend=None):
+        from scripts.transcribe import HindiTranscriber, DEFAULT_BACKEND
+        return HindiTranscriber(model_size=model_size or args.model, backend=backend or DEFAULT_BACKEND)
+
+    try:
+        run_pipeline(args.title, args.url, make_transcriber, audio_format=args.audio_format,
+                     segmented=args.segmented, until=args.until, captions_first=args.captions_first)
+    except Exception as e:
+        raise MyException(str(e), sys)
+
+    print(f"✅ {args.title}: done up to {args.until}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
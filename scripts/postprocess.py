@@ -0,0 +1,95 @@
+import re
+import threading
+from scripts.logger import logging
+
+
+# Compiled once at import; each pass runs per segment so work and memory
+# scale with the segment, not the whole transcript.
+
+# The same 1-6 word phrase repeated three or more times in a row is a typical
+# Whisper hallucination loop ("धन्यवाद धन्यवाद धन्यवाद ..."); keep one copy.
+REPEATED_PHRASE = re.compile(r"(?<!\S)((?:\S+\s+){0,5}?\S+)(?:\s+\1(?![^\s।॥?!,.;:])){2,}")
+WHITESPACE = re.compile(r"\s+")
+SPACE_BEFORE_PUNCT = re.compile(r"\s+([।॥?!,.;:])")
+# A full stop or pipe after Devanagari text is a danda
+LATIN_STOP_AFTER_DEVANAGARI = re.compile(r"(?<=[ऀ-ॿ])\s*[.|](?!\d)")
+REPEATED_DANDA = re.compile(r"।{2,}")
+TERMINAL_PUNCT = re.compile(r"[।॥?!.]$")
+DEVANAGARI_END = re.compile(r"[ऀ-ॿ]$")
+
+# Languages with an indicnlp normalizer; other languages only get whitespace and repetition cleanup
+INDIC_NORMALIZER_LANGUAGES = {"as", "bn", "gu", "hi", "kn", "ml", "mr", "ne", "or", "pa", "sa", "ta", "te"}
+# Devanagari languages that end sentences with a danda (Marathi uses the full stop)
+DANDA_LANGUAGES = {"hi", "ne", "sa"}
+
+_normalizers = {}
+_normalizers_lock = threading.Lock()
+
+
+def get_normalizer(lang="hi"):
+    """Return the process-wide Indic normalizer for `lang`, loading it on first use, or None."""
+    if lang not in INDIC_NORMALIZER_LANGUAGES:
+        return None
+    with _normalizers_lock:
+        if lang not in _normalizers:
+            from indicnlp.normalize.indic_normalize import IndicNormalizerFactory
+            logging.info(f"Loading Indic normalizer for '{lang}'")
+            _normalizers[lang] = IndicNormalizerFactory().get_normalizer(lang)
+        return _normalizers[lang]
+
+
+def remove_repetitions(text):
+    return REPEATED_PHRASE.sub(r"\1", text)
+
+
+def restore_punctuation(text):
+    """
+    Turn the full stops and pipes Whisper wrote after Devanagari into dandas and
+    tidy spacing around punctuation. Segments often end mid-sentence, so no
+    danda is added where the model did not put a stop.
+    """
+    text = LATIN_STOP_AFTER_DEVANAGARI.sub("।", text)
+    text = SPACE_BEFORE_PUNCT.sub(r"\1", text)
+    return REPEATED_DANDA.sub("।", text)
+
+
+def end_transcript(text, lang="hi"):
+    """Close a whole joined transcript with a danda if it stops without one."""
+    if lang in DANDA_LANGUAGES and DEVANAGARI_END.search(text) and not TERMINAL_PUNCT.search(text):
+        text += "।"
+    return text
+
+
+def clean_segment(text, lang="hi"):
+    """Normalize and clean the text of a single segment."""
+    text = WHITESPACE.sub(" ", text).strip()
+    if not text:
+        return ""
+    normalizer = get_normalizer(lang)
+    if normalizer is not None:
+        text = normalizer.normalize(text)
+    text = remove_repetitions(text)
+    if lang in DANDA_LANGUAGES:
+        text = restore_punctuation(text)
+    return text
+
+
+def iter_clean(texts, lang="hi"):
+    """Clean segment texts one at a time as they arrive, skipping empty ones."""
+    for text in texts:
+        cleaned = clean_segment(text, lang)
+        if cleaned:
+            yield cleaned
+
+
+def clean_transcript(texts, lang="hi"):
+    """Clean an iterable of segment texts and join them once at the end."""
+    return end_transcript(" ".join(iter_clean(texts, lang)), lang)
+
+
+def clean_segments(segments, lang="hi"):
+    """Clean the text of timed segments, keeping their timings and dropping empty ones."""
+    for segment in segments:
+        text = clean_segment(segment["text"], lang)
+        if text:
+            yield dict(segment, text=text)
@@ -0,0 +1,271 @@
+"""
+Resource-aware choice of Whisper model size, device and thread counts.
+
+`plan_job` looks at available RAM, CPU cores (respecting cgroup limits),
+free GPU memory and a per-job latency budget, and picks the largest Whisper
+model expected to fit in memory and finish in time. Every decision is logged
+with its reasons and any field can be overridden explicitly or through the
+WHISPER_MODEL_SIZE / WHISPER_DEVICE / TORCH_THREADS environment variables.
+"""
+import os
+import subprocess
+from scripts.logger import logging
+
+
+# Approximate resident memory (MB) per Whisper size in fp32 and CPU real-time
+# factor on REFERENCE_CORES cores. RTF scales roughly inversely with cores.
+WHISPER_PROFILES = {
+    "tiny": {"ram_mb": 400, "vram_mb": 1000, "cpu_rtf": 0.08},
+    "base": {"ram_mb": 600, "vram_mb": 1000, "cpu_rtf": 0.15},
+    "small": {"ram_mb": 1400, "vram_mb": 2000, "cpu_rtf": 0.45},
+    "medium": {"ram_mb": 3800, "vram_mb": 5000, "cpu_rtf": 1.3},
+    "large": {"ram_mb": 7000, "vram_mb": 10000, "cpu_rtf": 2.6},
+}
+MODEL_ORDER = ["large", "medium", "small", "base", "tiny"]
+REFERENCE_CORES = 8
+GPU_RTF_FACTOR = 0.1
+
+SUMMARIZER_RAM_MB = 2500
+SUMMARIZER_VRAM_MB = 3000
+
+DEFAULT_TARGET_RTF = 1.0
+# Headroom kept free for the OS, Python, decoded audio and the web worker
+RESERVED_RAM_MB = 1024
+
+
+class ResourceEnvelope:
+    """Resources available to this worker."""
+
+    def __init__(self, available_ram_mb, cpu_cores, gpu_free_mb=0):
+        self.available_ram_mb = available_ram_mb
+        self.cpu_cores = cpu_cores
+        self.gpu_free_mb = gpu_free_mb
+
+    def __repr__(self):
+        return (f"ResourceEnvelope(available_ram_mb={self.available_ram_mb}, "
+                f"cpu_cores={self.cpu_cores}, gpu_free_mb={self.gpu_free_mb})")
+
+
+class JobPlan:
+    """Model and thread settings chosen for a job, with the reasons for each choice."""
+
+    def __init__(self, model_size, device, intra_op_threads, inter_op_threads,
+                 predicted_seconds=None, reasons=None):
+        self.model_size = model_size
+        self.device = device
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.predicted_seconds = predicted_seconds
+        self.reasons = reasons or []
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+    def __repr__(self):
+        return f"JobPlan({self.as_dict()})"
+
+
+def _read_int(path):
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+        return None if value == "max" else int(value)
+    except (OSError, ValueError):
+        return None
+
+
+def available_ram_mb():
+    """MemAvailable from /proc/meminfo, capped by the cgroup v2 memory limit if there is one."""
+    available = None
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) // 1024
+                    break
+    except OSError:
+        pass
+
+    limit = _read_int("/sys/fs/cgroup/memory.max")
+    if limit is not None:
+        used = _read_int("/sys/fs/cgroup/memory.current") or 0
+        cgroup_available = (limit - used) // (1024 * 1024)
+        available = cgroup_available if available is None else min(available, cgroup_available)
+    return available if available is not None else 4096
+
+
+def cpu_cores():
+    """Usable cores: CPU affinity, capped by the cgroup v2 CPU quota if there is one."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cores = min(cores, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+
+def detect_resources():
+    gpu_free = 0
+    try:
+        import torch
+        if torch.cuda.is_available():
+            from scripts.transcribe import get_free_gpu_memory
+            gpu_free = max(0, get_free_gpu_memory())
+    except ImportError:
+        pass
+    return ResourceEnvelope(available_ram_mb(), cpu_cores(), gpu_free)
+
+
+def summarizer_fits_on_gpu(gpu_free_mb):
+    return gpu_free_mb >= SUMMARIZER_VRAM_MB
+
+
+def audio_duration(path):
+    """Duration of an audio file in seconds via ffprobe, or None if it cannot be read."""
+    # Honours FFMPEG_LOCATION even before check_ffmpeg has put it on PATH
+    from scripts.download_audio import ffprobe_binary
+    try:
+        result = subprocess.run(
+            [ffprobe_binary(), "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        return float(result.stdout.strip())
+    except (OSError, ValueError):
+        return None
+
+
+def resident_memory_mb(loaded):
+    """Expected (RAM, GPU) MB held by already loaded registry keys (model_size, summarizer, device, backend)."""
+    ram_mb = vram_mb = 0
+    for size, summarizer_model, device, _ in loaded:
+        profile = WHISPER_PROFILES.get(size, WHISPER_PROFILES["medium"])
+        if device == "cuda":
+            vram_mb += profile["vram_mb"]
+        else:
+            ram_mb += profile["ram_mb"]
+        # load_summarizer may have moved it to CPU; counting it in RAM is the safe side
+        if summarizer_model is not None:
+            ram_mb += SUMMARIZER_RAM_MB
+    return ram_mb, vram_mb
+
+
+def plan_job(audio_seconds=None, latency_budget_s=None, target_rtf=None, concurrent_jobs=1,
+             envelope=None, model_size=None, device=None, threads=None, loaded=None):
+    """
+    Choose the Whisper size, device and thread counts for one job.
+
+    The latency budget is `latency_budget_s`, or `audio_seconds * target_rtf`
+    when only the target real-time factor is known. RAM, GPU memory and cores
+    are divided evenly between `concurrent_jobs`. `loaded` lists the registry
+    keys this worker already holds: their memory counts as available, and a
+    loaded size that fits is preferred over loading another one. Explicit
+    arguments and the environment overrides take precedence over the automatic choice.
+    """
+    envelope = envelope or detect_resources()
+    reasons = []
+
+    model_size = model_size or os.getenv("WHISPER_MODEL_SIZE")
+    device = device or os.getenv("WHISPER_DEVICE")
+    threads = threads or (int(os.getenv("TORCH_THREADS")) if os.getenv("TORCH_THREADS") else None)
+
+    loaded = list(loaded or [])
+    # Memory of models this worker already holds is not in MemAvailable, but they can be reused
+    resident_ram, resident_vram = resident_memory_mb(loaded)
+    if loaded:
+        reasons.append(f"{len(loaded)} models loaded: {resident_ram} MB RAM, {resident_vram} MB GPU counted available")
+
+    jobs = max(1, concurrent_jobs)
+    job_cores = max(1, envelope.cpu_cores // jobs)
+    job_ram = (envelope.available_ram_mb + resident_ram - RESERVED_RAM_MB) / jobs
+    job_gpu = (envelope.gpu_free_mb + resident_vram) / jobs
+
+    # Threads: split cores between concurrent jobs so they do not oversubscribe
+    if threads:
+        intra_threads = threads
+        reasons.append(f"threads overridden to {threads}")
+    else:
+        intra_threads = job_cores
+        reasons.append(f"{envelope.cpu_cores} cores / {jobs} concurrent jobs -> {intra_threads} threads")
+    inter_threads = 1 if intra_threads <= 4 else 2
+
+    if device:
+        reasons.append(f"device overridden to {device}")
+    else:
+        device = "cuda" if job_gpu >= WHISPER_PROFILES["tiny"]["vram_mb"] else "cpu"
+        reasons.append(f"{job_gpu:.0f} MB GPU memory per job -> {device}")
+
+    if latency_budget_s is None and audio_seconds is not None:
+        latency_budget_s = audio_seconds * (target_rtf or float(os.getenv("TARGET_RTF", DEFAULT_TARGET_RTF)))
+
+    def predicted(size):
+        if audio_seconds is None:
+            return None
+        # Thread count only speeds up CPU decoding
+        if device == "cuda":
+            rtf = WHISPER_PROFILES[size]["cpu_rtf"] * GPU_RTF_FACTOR
+        else:
+            rtf = WHISPER_PROFILES[size]["cpu_rtf"] * REFERENCE_CORES / intra_threads
+        return audio_seconds * rtf
+
+    def fits(size):
+        if device == "cuda":
+            return WHISPER_PROFILES[size]["vram_mb"] <= job_gpu
+        return WHISPER_PROFILES[size]["ram_mb"] + SUMMARIZER_RAM_MB <= job_ram
+
+    if model_size:
+        reasons.append(f"model size overridden to {model_size}")
+    else:
+        candidates = []
+        for size in MODEL_ORDER:
+            if not fits(size):
+                memory = f"{job_gpu:.0f} MB GPU" if device == "cuda" else f"{job_ram:.0f} MB RAM"
+                reasons.append(f"{size}: does not fit in memory ({memory} per job)")
+                continue
+            seconds = predicted(size)
+            if latency_budget_s is not None and seconds is not None and seconds > latency_budget_s:
+                reasons.append(f"{size}: predicted {seconds:.0f}s exceeds budget {latency_budget_s:.0f}s")
+                continue
+            candidates.append(size)
+
+        # Reusing a loaded size keeps the worker from accumulating bundles of every size
+        loaded_sizes = {key[0] for key in loaded if key[2] == device}
+        reusable = [size for size in candidates if size in loaded_sizes]
+        if reusable:
+            model_size = reusable[0]
+            reasons.append(f"{model_size}: already loaded, fits memory and latency budget")
+        elif candidates:
+            model_size = candidates[0]
+            reasons.append(f"{model_size}: fits memory and latency budget")
+        else:
+            model_size = MODEL_ORDER[-1]
+            reasons.append(f"nothing fits, falling back to {model_size}")
+
+    plan = JobPlan(model_size, device, intra_threads, inter_threads,
+                   predicted_seconds=predicted(model_size) if model_size in WHISPER_PROFILES else None,
+                   reasons=reasons)
+    logging.info(f"Job plan for {envelope}: {plan}")
+    return plan
+
+
+_interop_set = False
+
+
+def apply_thread_settings(plan):
+    """Set torch intra-op threads for this worker (inter-op threads can only be set once)."""
+    global _interop_set
+    import torch
+
+    torch.set_num_threads(plan.intra_op_threads)
+    if not _interop_set:
+        try:
+            torch.set_interop_threads(plan.inter_op_threads)
+        except RuntimeError:
+            # Already fixed once parallel work has started in this process
+            pass
+        _interop_set = True
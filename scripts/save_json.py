@@ -1,35 +1,84 @@
 import json
 import os
 import sys
+import tempfile
 from scripts.exception import MyException
 from scripts.logger import logging
-from scripts.transcribe import HindiTranscriber
+from scripts.cache import md5_of_file, md5_of_text
+from scripts.metrics import metrics
+from scripts.store import get_transcript_store
 
-def save_transcript_and_summary(video_title, transcript, summary, output_folder="downloads/json_files/"):
+def json_file_id(video_id=None, url=None):
+    """Part of the export name that tells apart videos with the same title."""
+    return video_id or (md5_of_text(url)[:16] if url else None)
+
+
+def write_json_file(video_title, transcript, summary, output_folder="downloads/json_files/", file_id=None):
+    """
+    Writes the per-file JSON export named <title>_<file_id>.json, where
+    `file_id` is the video id or a hash of the URL (of the content if neither is
+    known), so jobs that share a title never overwrite each other.
+    The file is written to a temporary name and renamed, so readers never see a partial file.
+    """
+    # Ensure the folder exists
+    os.makedirs(output_folder, exist_ok=True)
+
+    # Prepare the data to be saved
+    data = {
+        "title": video_title,
+        "summary": summary,
+        "transcript": transcript
+    }
+
+    content = json.dumps(data, indent=4, ensure_ascii=False)
+
+    # Sanitize video title to create a valid filename
+    safe_title = "".join(c if c.isalnum() or c in " _-" else "_" for c in video_title)
+    file_id = "".join(c if c.isalnum() or c in "_-" else "_" for c in str(file_id or md5_of_text(content)[:16]))
+    output_file = os.path.join(output_folder, f"{safe_title}_{file_id}.json")
+
+    # Skip the write when an identical result is already on disk
+    if os.path.exists(output_file) and md5_of_file(output_file) == md5_of_text(content):
+        logging.info(f"Identical transcript already saved at: {output_file}")
+        return output_file
+
+    # Save the data as a single JSON object
+    fd, tmp_path = tempfile.mkstemp(dir=output_folder, suffix=".json.tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(content)
+        os.replace(tmp_path, output_file)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return output_file
+
+
+@metrics.timed("save_json")
+def save_transcript_and_summary(video_title, transcript, summary, output_folder="downloads/json_files/",
+                                url=None, video_id=None, model_config=None, segments=None, export_json=None):
     """
-    Saves video transcript and summary to a JSON file.
-    Each video will be saved in a separate file named after the video title.
+    Saves video transcript and summary to the transcript store and, unless
+    disabled with EXPORT_JSON_FILES=0, to a JSON file named after the video title.
+    Returns the JSON file path, or None when no file was exported.
     """
     try:
         logging.info(f"Starting to save transcript and summary for: {video_title}")
 
-        # Ensure the folder exists
-        os.makedirs(output_folder, exist_ok=True)
-
-        # Sanitize video title to create a valid filename
-        safe_title = "".join(c if c.isalnum() or c in " _-" else "_" for c in video_title)
-        output_file = os.path.join(output_folder, f"{safe_title}.json")
+        record_id = get_transcript_store().add(
+            video_title, transcript, summary,
+            video_id=video_id, url=url, model_config=model_config, segments=segments
+        )
+        logging.info(f"Transcript stored with id {record_id}")
 
-        # Prepare the data to be saved
-        data = {
-            "title": video_title,
-            "summary": summary,
-            "transcript": transcript
-        }
+        if export_json is None:
+            export_json = os.getenv("EXPORT_JSON_FILES", "1") == "1"
+        if not export_json:
+            return None
 
-        # Save the data as a single JSON object
-        with open(output_file, "w", encoding="utf-8") as file:
-            json.dump(data, file, indent=4, ensure_ascii=False)
+        output_file = write_json_file(video_title, transcript, summary, output_folder,
+                                      file_id=json_file_id(video_id, url))
 
         logging.info(f"✅ Transcript and summary saved successfully to: {output_file}")
         return output_file
@@ -37,7 +86,6 @@ def save_transcript_and_summary(video_title, transcript, summary, output_folder=
     except Exception as e:
         logging.error(f"❌ Error saving transcript and summary: {e}")
         raise MyException(f"Failed to save transcript and summary: {e}", sys)
-    
 
 
 
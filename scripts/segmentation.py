@@ -0,0 +1,118 @@
+from scripts.logger import logging
+
+
+SAMPLE_RATE = 16000
+
+
+def frame_energy(audio, frame_ms=30):
+    """Return the RMS energy of consecutive non-overlapping frames."""
+    import numpy as np
+
+    frame_len = int(SAMPLE_RATE * frame_ms / 1000)
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32), frame_len
+    frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    return np.sqrt(np.mean(frames ** 2, axis=1)), frame_len
+
+
+def find_silences(audio, frame_ms=30, min_silence_ms=300, threshold_ratio=0.1):
+    """
+    Simple energy-based VAD.
+    Returns (start_sample, end_sample) pairs of regions whose energy stays below
+    `threshold_ratio` of the median speech energy for at least `min_silence_ms`.
+    """
+    import numpy as np
+
+    energy, frame_len = frame_energy(audio, frame_ms)
+    if len(energy) == 0:
+        return []
+
+    voiced = energy[energy > 0]
+    if len(voiced) == 0:
+        return [(0, len(audio))]
+    threshold = np.median(voiced) * threshold_ratio
+    silent = energy < threshold
+
+    min_frames = max(1, min_silence_ms // frame_ms)
+    silences = []
+    # Locate runs of silent frames with a diff over the padded boolean mask
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    for start, end in zip(starts, ends):
+        if end - start >= min_frames:
+            silences.append((int(start * frame_len), int(end * frame_len)))
+    return silences
+
+
+def split_on_silence(audio, target_s=60, max_s=120, overlap_s=1.0, **vad_kwargs):
+    """
+    Split audio into chunks of roughly `target_s` seconds, cutting in the middle
+    of the silence closest to the target and never exceeding `max_s`.
+    Each chunk after the first starts `overlap_s` seconds early so words cut at a
+    boundary appear in both chunks; `stitch_texts` removes the duplicate.
+    Returns a list of (start_sample, end_sample) pairs.
+    """
+    import numpy as np
+
+    total = len(audio)
+    target = int(target_s * SAMPLE_RATE)
+    max_len = int(max_s * SAMPLE_RATE)
+    overlap = int(overlap_s * SAMPLE_RATE)
+
+    if total <= max_len:
+        return [(0, total)]
+
+    cut_points = np.array([(s + e) // 2 for s, e in find_silences(audio, **vad_kwargs)], dtype=np.int64)
+
+    chunks = []
+    start = 0
+    while total - start > max_len:
+        ideal = start + target
+        candidates = cut_points[(cut_points > start + target // 2) & (cut_points <= start + max_len)]
+        if len(candidates):
+            cut = int(candidates[np.argmin(np.abs(candidates - ideal))])
+        else:
+            # No usable silence: fall back to a hard cut at the maximum length
+            cut = start + max_len
+        chunks.append((max(0, start - overlap) if chunks else start, cut))
+        start = cut
+    chunks.append((max(0, start - overlap), total))
+
+    logging.info(f"Split {total / SAMPLE_RATE:.1f}s of audio into {len(chunks)} chunks")
+    return chunks
+
+
+def stitch_texts(texts, max_overlap_words=20):
+    """
+    Join chunk transcripts in order, dropping words at the start of each chunk
+    that repeat the end of the previous one (the overlap region).
+    """
+    words = []
+    for text in texts:
+        chunk_words = text.split()
+        if not chunk_words:
+            continue
+        limit = min(max_overlap_words, len(words), len(chunk_words))
+        skip = 0
+        for size in range(limit, 0, -1):
+            if words[-size:] == chunk_words[:size]:
+                skip = size
+                break
+        words.extend(chunk_words[skip:])
+    return " ".join(words)
+
+
+def merge_chunk_segments(chunks, chunk_segments):
+    """
+    Combine per-chunk timed segments (absolute seconds) into one list. Each
+    chunk after the first starts `overlap_s` early, so a segment whose midpoint
+    lies before the end of the previous chunk was already kept there.
+    """
+    merged = []
+    for i, segments in enumerate(chunk_segments):
+        boundary = chunks[i - 1][1] / SAMPLE_RATE if i else 0.0
+        merged.extend(segment for segment in segments
+                      if not i or (segment["start"] + segment["end"]) / 2 >= boundary)
+    return merged
@@ -0,0 +1,195 @@
+"""
+SQLite transcript store with FTS5 full-text search.
+
+Replaces one JSON file per title as the system of record: every save is a row
+with title, URL/video id, model config, segment timings, transcript and
+summary, written in a single transaction. Per-file JSON in the original format
+can still be exported.
+
+Usage:
+    python -m scripts.store search "इतिहास"
+    python -m scripts.store export downloads/json_files/ [--id 12]
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+from scripts.exception import MyException
+from scripts.logger import logging
+
+
+# unicode61 treats Devanagari vowel signs, virama and other combining marks
+# (categories Mn/Mc) as separators, which would cut "सभ्यता" into "सभ" and "यत"
+# and make "का" match "के". Declaring them token characters keeps words whole.
+DEVANAGARI_MARKS = "".join(
+    chr(code)
+    for first, last in ((0x0900, 0x0903), (0x093A, 0x094F), (0x0951, 0x0957), (0x0962, 0x0963))
+    for code in range(first, last + 1)
+)
+FTS_TOKENIZER = f"unicode61 remove_diacritics 0 tokenchars '{DEVANAGARI_MARKS}'"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_id TEXT,
+    url TEXT,
+    title TEXT NOT NULL,
+    model_config TEXT,
+    segments TEXT,
+    transcript TEXT NOT NULL,
+    summary TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transcripts_video_id ON transcripts (video_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts USING fts5(
+    title, transcript, summary,
+    content='transcripts', content_rowid='id',
+    tokenize="{tokenizer}"
+);
+
+CREATE TRIGGER IF NOT EXISTS transcripts_ai AFTER INSERT ON transcripts BEGIN
+    INSERT INTO transcripts_fts (rowid, title, transcript, summary)
+    VALUES (new.id, new.title, new.transcript, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_ad AFTER DELETE ON transcripts BEGIN
+    INSERT INTO transcripts_fts (transcripts_fts, rowid, title, transcript, summary)
+    VALUES ('delete', old.id, old.title, old.transcript, old.summary);
+END;
+""".format(tokenizer=FTS_TOKENIZER)
+
+
+class TranscriptStore:
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.getenv("TRANSCRIPT_DB_PATH", "downloads/transcripts.sqlite3")
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            self._migrate_fts(conn)
+            conn.executescript(SCHEMA)
+
+    @staticmethod
+    def _migrate_fts(conn):
+        """Drop a search index built with another tokenizer; it is recreated and rebuilt below."""
+        row = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'transcripts_fts'").fetchone()
+        if row is None or FTS_TOKENIZER in row[0]:
+            return
+        logging.info("Rebuilding the transcript search index with the Devanagari tokenizer")
+        conn.execute("DROP TABLE transcripts_fts")
+        conn.executescript(SCHEMA)
+        conn.execute("INSERT INTO transcripts_fts (transcripts_fts) VALUES ('rebuild')")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _row_to_record(self, row):
+        if row is None:
+            return None
+        record = dict(row)
+        record["model_config"] = json.loads(record["model_config"]) if record["model_config"] else None
+        record["segments"] = json.loads(record["segments"]) if record["segments"] else None
+        return record
+
+    def add(self, title, transcript, summary, video_id=None, url=None, model_config=None, segments=None):
+        """Insert a transcript atomically and return its id."""
+        try:
+            with self._connect() as conn:
+                cur = conn.execute(
+                    "INSERT INTO transcripts (video_id, url, title, model_config, segments, transcript, summary, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (video_id, url, title,
+                     json.dumps(model_config, ensure_ascii=False) if model_config else None,
+                     json.dumps(segments, ensure_ascii=False) if segments else None,
+                     transcript, summary, time.time())
+                )
+                return cur.lastrowid
+        except sqlite3.Error as e:
+            logging.error(f"Failed to store transcript: {e}")
+            raise MyException(str(e), sys)
+
+    def get(self, record_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM transcripts WHERE id = ?", (record_id,)).fetchone()
+        return self._row_to_record(row)
+
+    def get_by_video_id(self, video_id):
+        """Latest transcript for a video id."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM transcripts WHERE video_id = ? ORDER BY id DESC LIMIT 1", (video_id,)
+            ).fetchone()
+        return self._row_to_record(row)
+
+    def search(self, query, limit=20):
+        """Full-text search over title, transcript and summary, best matches first."""
+        # Quote each term so punctuation in Hindi text is not read as FTS5 syntax
+        fts_query = " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+        if not fts_query:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT t.id, t.video_id, t.url, t.title, t.summary, "
+                "snippet(transcripts_fts, 1, '[', ']', '…', 16) AS snippet "
+                "FROM transcripts_fts JOIN transcripts t ON t.id = transcripts_fts.rowid "
+                "WHERE transcripts_fts MATCH ? ORDER BY bm25(transcripts_fts) LIMIT ?",
+                (fts_query, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def iter_ids(self):
+        with self._connect() as conn:
+            for row in conn.execute("SELECT id FROM transcripts ORDER BY id"):
+                yield row["id"]
+
+    def export_json(self, record_id, output_folder="downloads/json_files/"):
+        """Write a record in the per-file JSON format of save_transcript_and_summary."""
+        from scripts.save_json import write_json_file, json_file_id
+
+        record = self.get(record_id)
+        if record is None:
+            raise MyException(f"No transcript with id {record_id}", sys)
+        return write_json_file(record["title"], record["transcript"], record["summary"], output_folder,
+                               file_id=json_file_id(record.get("video_id"), record.get("url")))
+
+
+_store = None
+
+
+def get_transcript_store():
+    """Process-wide TranscriptStore, created on first use."""
+    global _store
+    if _store is None:
+        _store = TranscriptStore()
+    return _store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    search = sub.add_parser("search")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=20)
+    export = sub.add_parser("export")
+    export.add_argument("output_folder")
+    export.add_argument("--id", type=int, help="Export one record instead of all")
+    args = parser.parse_args(argv)
+
+    store = get_transcript_store()
+    if args.command == "search":
+        for hit in store.search(args.query, args.limit):
+            print(f"{hit['id']}\t{hit['title']}\t{hit['snippet']}")
+    else:
+        ids = [args.id] if args.id else list(store.iter_ids())
+        for record_id in ids:
+            print(store.export_json(record_id, args.output_folder))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Timestamped transcript formats: SRT, WebVTT and compact segment JSON.
+
+Segments are {"start", "end", "text"} dicts in seconds, optionally with
+"words": [{"word", "start", "end", "probability"}]. Each format is produced
+by a generator of text pieces, so files are written (and HTTP responses
+streamed) one segment at a time instead of building the document in memory.
+"""
+import os
+import json
+import tempfile
+
+
+OUTPUT_FORMATS = ("srt", "vtt", "json")
+CONTENT_TYPES = {
+    "srt": "application/x-subrip; charset=utf-8",
+    "vtt": "text/vtt; charset=utf-8",
+    "json": "application/json; charset=utf-8",
+}
+
+
+def format_timestamp(seconds, separator=","):
+    """HH:MM:SS,mmm for SRT; pass separator="." for WebVTT."""
+    millis = int(round(max(0.0, seconds) * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def iter_srt(segments):
+    for number, segment in enumerate(segments, start=1):
+        yield (f"{number}\n{format_timestamp(segment['start'])} --> {format_timestamp(segment['end'])}\n"
+               f"{segment['text'].strip()}\n\n")
+
+
+def iter_vtt(segments):
+    yield "WEBVTT\n\n"
+    for segment in segments:
+        yield (f"{format_timestamp(segment['start'], '.')} --> {format_timestamp(segment['end'], '.')}\n"
+               f"{segment['text'].strip()}\n\n")
+
+
+def iter_segments_json(segments):
+    """A JSON array with one compact segment object per line."""
+    yield "["
+    for i, segment in enumerate(segments):
+        yield ("," if i else "") + "\n" + json.dumps(segment, ensure_ascii=False, separators=(",", ":"))
+    yield "\n]\n"
+
+
+RENDERERS = {"srt": iter_srt, "vtt": iter_vtt, "json": iter_segments_json}
+
+
+def render(segments, fmt):
+    """Generator of text pieces of `segments` in format `fmt`."""
+    if fmt not in RENDERERS:
+        raise ValueError(f"Unsupported output format: {fmt}. Choose from {OUTPUT_FORMATS}.")
+    return RENDERERS[fmt](segments)
+
+
+def write_format(segments, path, fmt):
+    """Stream `segments` into `path` through a temporary file that is renamed into place."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for piece in render(segments, fmt):
+                f.write(piece)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def write_outputs(segments, output_dir, basename, formats=OUTPUT_FORMATS):
+    """Write every requested format as <output_dir>/<basename>.<ext>; returns {format: path}."""
+    paths = {}
+    for fmt in formats:
+        ext = "segments.json" if fmt == "json" else fmt
+        paths[fmt] = write_format(segments, os.path.join(output_dir, f"{basename}.{ext}"), fmt)
+    return paths
+
+
+def read_segments_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
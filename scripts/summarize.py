@@ -0,0 +1,183 @@
+import sys
+import queue
+import threading
+from scripts.logger import logging
+from scripts.exception import MyException
+
+
+def chunk_by_tokens(text, tokenizer, chunk_tokens=480, overlap_tokens=32):
+    """
+    Split text into pieces of at most `chunk_tokens` tokens using the
+    summarizer's own tokenizer, with `overlap_tokens` shared between neighbours.
+    """
+    if overlap_tokens >= chunk_tokens:
+        raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+
+    ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+    if len(ids) <= chunk_tokens:
+        return [text], len(ids)
+
+    step = chunk_tokens - overlap_tokens
+    chunks = []
+    for start in range(0, len(ids), step):
+        window = ids[start:start + chunk_tokens]
+        chunks.append(tokenizer.decode(window, skip_special_tokens=True))
+        if start + chunk_tokens >= len(ids):
+            break
+    return chunks, len(ids)
+
+
+def default_chunk_tokens(tokenizer, margin=32):
+    """Largest chunk that fits the model context, leaving room for special tokens."""
+    max_len = getattr(tokenizer, "model_max_length", 512)
+    # Some tokenizers report a huge sentinel value when the limit is unknown
+    if not max_len or max_len > 100000:
+        max_len = 512
+    return max_len - margin
+
+
+def summarize_long(summarizer, text, chunk_tokens=None, overlap_tokens=32, batch_size=4,
+                   max_length=100, min_length=30, max_rounds=5):
+    """
+    Map-reduce summarization for text longer than the model context.
+    The text is split into token-bounded chunks that are summarized in batches;
+    the partial summaries are joined and summarized again until the result fits
+    in a single chunk, which gets the final summary.
+    """
+    try:
+        tokenizer = summarizer.tokenizer
+        chunk_tokens = chunk_tokens or default_chunk_tokens(tokenizer)
+
+        for round_no in range(max_rounds):
+            chunks, n_tokens = chunk_by_tokens(text, tokenizer, chunk_tokens, overlap_tokens)
+            if len(chunks) == 1:
+                break
+
+            logging.info(
+                f"Summarization round {round_no + 1}: {n_tokens} tokens in {len(chunks)} chunks"
+            )
+            partials = summarizer(
+                chunks, max_length=max_length, min_length=min(min_length, max_length // 2),
+                do_sample=False, truncation=True, batch_size=batch_size
+            )
+            text = " ".join(item["summary_text"] for item in partials)
+        else:
+            logging.warning("Summary still exceeds the context after the last round, truncating.")
+
+        result = summarizer(text, max_length=max_length, min_length=min_length,
+                            do_sample=False, truncation=True)
+        return result[0]["summary_text"]
+
+    except Exception as e:
+        logging.error(f"Error in summarize_long: {e}")
+        raise MyException(str(e), sys)
+
+
+class StreamingSummarizer:
+    """
+    The map step of summarize_long, run while the transcript is still being decoded.
+
+    `feed(text)` takes transcript text once it is final. Every `chunk_tokens`
+    tokens (neighbours sharing `overlap_tokens`, as in chunk_by_tokens) are
+    summarized by a background thread while decoding goes on. `finish()` adds
+    the remaining tail and reduces the partial summaries like summarize_long,
+    so only the last chunk and the reduce are left once decoding ends.
+    """
+
+    def __init__(self, summarizer, chunk_tokens=None, overlap_tokens=32, batch_size=4,
+                 max_length=100, min_length=30):
+        self.summarizer = summarizer
+        self.tokenizer = summarizer.tokenizer
+        self.chunk_tokens = chunk_tokens or default_chunk_tokens(self.tokenizer)
+        if overlap_tokens >= self.chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+        self.overlap_tokens = overlap_tokens
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.min_length = min_length
+
+        self.texts = []
+        self._ids = []
+        self._chunks = 0
+        self._partials = []
+        self._error = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="streaming-summarizer", daemon=True)
+        self._thread.start()
+
+    @property
+    def text(self):
+        """Everything fed so far, joined the way the transcript is."""
+        return " ".join(self.texts)
+
+    def feed(self, text):
+        if not text:
+            return
+        self.texts.append(text)
+        self._ids.extend(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+        step = self.chunk_tokens - self.overlap_tokens
+        while len(self._ids) >= self.chunk_tokens:
+            self._submit(self._ids[:self.chunk_tokens])
+            self._ids = self._ids[step:]
+
+    def _submit(self, ids):
+        self._chunks += 1
+        self._queue.put(self.tokenizer.decode(ids, skip_special_tokens=True))
+
+    def _run(self):
+        while True:
+            chunks = [self._queue.get()]
+            # Summarize whatever has queued up meanwhile in one batch
+            while len(chunks) < self.batch_size and chunks[-1] is not None:
+                try:
+                    chunks.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            done = chunks[-1] is None
+            chunks = [chunk for chunk in chunks if chunk is not None]
+            if chunks and self._error is None:
+                try:
+                    partials = self.summarizer(
+                        chunks, max_length=self.max_length,
+                        min_length=min(self.min_length, self.max_length // 2),
+                        do_sample=False, truncation=True, batch_size=self.batch_size
+                    )
+                    self._partials.extend(item["summary_text"] for item in partials)
+                except Exception as e:
+                    logging.error(f"Error in streaming summarizer: {e}")
+                    self._error = e
+            if done:
+                return
+
+    def close(self):
+        """Stop the background thread after the chunks already queued."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def finish(self):
+        """Summary of everything fed, waiting for the chunks still in progress."""
+        try:
+            if self._chunks == 0:
+                # Everything fits in one chunk: summarize it directly, as summarize_long does
+                self.close()
+                return summarize_long(self.summarizer, self.text, chunk_tokens=self.chunk_tokens,
+                                      overlap_tokens=self.overlap_tokens, batch_size=self.batch_size,
+                                      max_length=self.max_length, min_length=self.min_length)
+
+            # The tail always holds the overlap; anything beyond it is new text
+            if len(self._ids) > self.overlap_tokens:
+                self._submit(self._ids)
+            self._ids = []
+            self.close()
+            if self._error is not None:
+                raise self._error
+
+            logging.info(f"Reducing {len(self._partials)} partial summaries of {self._chunks} chunks")
+            return summarize_long(self.summarizer, " ".join(self._partials), chunk_tokens=self.chunk_tokens,
+                                  overlap_tokens=self.overlap_tokens, batch_size=self.batch_size,
+                                  max_length=self.max_length, min_length=self.min_length)
+
+        except Exception as e:
+            logging.error(f"Error in StreamingSummarizer.finish: {e}")
+            raise MyException(str(e), sys)
@@ -1,19 +1,46 @@
-import whisper
-from indicnlp.normalize.indic_normalize import DevanagariNormalizer
-import re
 import os
 import sys
 import subprocess
 import time
-from transformers import pipeline
+import threading
+from collections import OrderedDict, Counter
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import struct
+import hashlib
+import gc
+import ctypes
 from scripts.logger import logging
 from scripts.exception import MyException
-from scripts.download_audio import download_audio
+from scripts.summarize import summarize_long, StreamingSummarizer
+from scripts.cache import result_cache, md5_of_file
+from scripts.metrics import metrics, current_rss_bytes
+from scripts.backends import DEFAULT_BACKEND, load_backend
+from scripts.batching import get_batch_scheduler
+from scripts.postprocess import clean_segments, end_transcript
+from scripts.resources import summarizer_fits_on_gpu
+from scripts.checkpoint import PipelineCheckpoint
+from scripts.language import LANGUAGE_DETECT_WINDOWS, requested_language, choose_language, can_summarize
+from scripts.segmentation import SAMPLE_RATE, split_on_silence, stitch_texts, merge_chunk_segments
+from scripts.subtitles import OUTPUT_FORMATS
 import warnings
-import torch 
+
+# whisper, torch, transformers, numpy and indicnlp take seconds to import, so they
+# are imported inside the functions that need them rather than at module load.
 
 warnings.filterwarnings("ignore")
 
+DEFAULT_SUMMARIZER = "csebuetnlp/mT5_multilingual_XLSum"
+# Audio decoded between two transcript checkpoints
+CHECKPOINT_WINDOW_S = int(os.getenv("CHECKPOINT_WINDOW_S", 300))
+# Subtitle and segment files written next to each transcript
+TRANSCRIPT_FORMATS = [fmt for fmt in os.getenv("TRANSCRIPT_FORMATS", ",".join(OUTPUT_FORMATS)).split(",") if fmt]
+WORD_TIMESTAMPS = os.getenv("WORD_TIMESTAMPS", "0") == "1"
+# Run each summary in a short-lived process so its memory is returned to the OS
+SUMMARIZE_IN_SUBPROCESS = os.getenv("SUMMARIZE_IN_SUBPROCESS", "0") == "1"
+# Summarize finished transcript windows while Whisper decodes the rest
+SPECULATIVE_SUMMARY = os.getenv("SPECULATIVE_SUMMARY", "0") == "1"
+
 
 def ensure_directory_exists(directory):
     try:
@@ -26,6 +53,10 @@ def ensure_directory_exists(directory):
 
 
 def check_ffmpeg():
+    # Whisper runs "ffmpeg" from PATH, so a configured FFMPEG_LOCATION is put on it
+    location = os.getenv("FFMPEG_LOCATION")
+    if location and os.path.isdir(location) and location not in os.environ["PATH"].split(os.pathsep):
+        os.environ["PATH"] = location + os.pathsep + os.environ["PATH"]
     try:
         subprocess.run(["ffmpeg", "-version"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         logging.info("FFmpeg is installed and available.")
@@ -35,27 +66,103 @@ def check_ffmpeg():
 
 
 
-class HindiTranscriber:
-    def __init__(self, audio_file, model_size="base", summarizer_model="csebuetnlp/mT5_multilingual_XLSum"):
-        check_ffmpeg()
+def get_free_gpu_memory():
+    try:
+        result = subprocess.run(
+            ["nvidia-smi", "--query-gpu=memory.free", "--format=csv,nounits,noheader"],
+            stdout=subprocess.PIPE, text=True
+        )
+        mem = int(result.stdout.strip().split('\n')[0])
+        return mem
+    except Exception as e:
+        logging.warning("Unable to get GPU memory info. Assuming low memory.")
+        return -1
+
+
+def detect_device():
+    """Return the default device for Whisper ("cuda" if available, else "cpu")."""
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _pcm_wav_data(path):
+    """
+    Return (offset, n_samples) of the data chunk if `path` is a 16 kHz mono
+    16-bit PCM WAV file, otherwise None.
+    """
+    with open(path, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            return None
+        fmt_ok = False
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, size = struct.unpack("<4sI", chunk)
+            if chunk_id == b"fmt ":
+                fmt = f.read(size)
+                audio_fmt, channels, rate, _, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+                fmt_ok = audio_fmt == 1 and channels == 1 and rate == SAMPLE_RATE and bits == 16
+                if size % 2:
+                    f.seek(1, os.SEEK_CUR)
+            elif chunk_id == b"data":
+                return (f.tell(), size // 2) if fmt_ok else None
+            else:
+                f.seek(size + size % 2, os.SEEK_CUR)
 
-        # Automatically detect GPU
-        if torch.cuda.is_available():
-            self.device = "cuda"
-            self.device_id = 0
-        else:
-            self.device = "cpu"
-            self.device_id = -1
 
-        self.model_size = model_size
-        self.file_path = audio_file
+def load_audio_array(audio):
+    """
+    Return audio as a float32 array at 16 kHz, decoding it at most once.
+    Arrays are passed through; 16 kHz mono PCM WAV files are memory-mapped
+    without running ffmpeg; anything else is decoded by ffmpeg via Whisper.
+    """
+    import numpy as np
+    if isinstance(audio, np.ndarray):
+        return audio
 
-        self._log_gpu_memory_info()
+    pcm = _pcm_wav_data(audio)
+    if pcm is not None:
+        offset, n_samples = pcm
+        samples = np.memmap(audio, dtype="<i2", mode="r", offset=offset, shape=(n_samples,))
+        return samples.astype(np.float32) / 32768.0
+
+    import whisper
+    return whisper.load_audio(audio)
+
+
+_fingerprints = {}
+
+
+def audio_fingerprint(audio):
+    """md5 of an audio file or array, used for cache and checkpoint keys."""
+    import numpy as np
+    if isinstance(audio, np.ndarray):
+        return hashlib.md5(np.ascontiguousarray(audio).tobytes()).hexdigest()
+    # Files are hashed once per process unless they change
+    stat = os.stat(audio)
+    key = (os.path.abspath(audio), stat.st_size, stat.st_mtime_ns)
+    if key not in _fingerprints:
+        _fingerprints[key] = md5_of_file(audio)
+    return _fingerprints[key]
+
+
+class ModelBundle:
+    """Whisper model and summarization pipeline loaded for one registry key."""
+
+    def __init__(self, model_size, summarizer_model, device, backend=DEFAULT_BACKEND):
+        self.key = (model_size, summarizer_model, device, backend)
+        self.model_size = model_size
+        self.summarizer_model = summarizer_model
+        self.device = device
+        self.backend = backend
+        self.device_id = 0 if device == "cuda" else -1
 
-        logging.info(f"Loading Whisper model '{self.model_size}' on {self.device}...")
-        print(f"🔁 Loading Whisper model: {self.model_size} on {self.device}")
+        logging.info(f"Loading Whisper model '{model_size}' on {device} ({backend} backend)...")
+        print(f"🔁 Loading Whisper model: {model_size} on {device}")
         try:
-            self.model = whisper.load_model(self.model_size, device=self.device)
+            self.model = load_backend(backend, model_size, device)
         except RuntimeError as e:
             logging.error(f"Failed to load Whisper model: {e}")
             raise MyException(str(e), sys)
@@ -63,87 +170,740 @@ class HindiTranscriber:
         logging.info("Whisper model loaded successfully.")
         print("✅ Whisper model loaded.")
 
-        logging.info("Loading summarization model...")
-        print("🔁 Loading summarization model...")
+        # Without a summarizer model, summaries are made in a subprocess (see summarize_in_subprocess)
+        self.summarizer = None
+        if summarizer_model is not None:
+            self.summarizer, self.device_id = load_summarizer(summarizer_model, self.device_id)
 
-        # GPU memory check before summarizer
-        if self.device == "cuda" and self.get_free_gpu_memory() < 3000:
-            logging.warning("Not enough GPU memory for summarizer, switching to CPU.")
-            self.device_id = -1
 
-        try:
-            self.summarizer = pipeline(
-                "summarization",
-                model=summarizer_model,
-                tokenizer=summarizer_model,
-                device=self.device_id
+def load_summarizer(summarizer_model, device_id):
+    """Load the summarization pipeline, on CPU if the GPU is short of memory. Returns (pipeline, device_id)."""
+    from transformers import pipeline
+
+    logging.info("Loading summarization model...")
+    print("🔁 Loading summarization model...")
+
+    # GPU memory check before summarizer
+    if device_id == 0 and not summarizer_fits_on_gpu(get_free_gpu_memory()):
+        logging.warning("Not enough GPU memory for summarizer, switching to CPU.")
+        device_id = -1
+
+    try:
+        summarizer = pipeline(
+            "summarization",
+            model=summarizer_model,
+            tokenizer=summarizer_model,
+            device=device_id
+        )
+    except Exception as e:
+        if device_id == 0:
+            logging.warning("Retrying summarizer on CPU...")
+            try:
+                summarizer = pipeline(
+                    "summarization",
+                    model=summarizer_model,
+                    tokenizer=summarizer_model,
+                    device=-1
+                )
+                device_id = -1
+                logging.info("Summarizer loaded on CPU.")
+            except Exception as ex:
+                logging.error(f"Summarization model failed on both GPU and CPU: {ex}")
+                raise MyException(str(ex), sys)
+        else:
+            logging.error(f"Failed to load summarization model: {e}")
+            raise MyException(str(e), sys)
+
+    logging.info("Summarization model loaded successfully.")
+    print("✅ Summarization model loaded.")
+    return summarizer, device_id
+
+
+def release_memory():
+    """Collect garbage and hand freed heap and CUDA cache back to the OS."""
+    gc.collect()
+    _empty_cuda_cache()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models keyed by (model_size, summarizer_model, device, backend).
+    Each key is loaded once per worker and shared across requests; the least
+    recently used idle bundle is evicted once more than `max_models` are resident.
+    Bundles a transcriber holds (see acquire) are never evicted, since it would
+    keep using them while the next get() loads a second copy.
+
+    With an RSS budget (`rss_budget_mb`, WORKER_RSS_BUDGET_MB), idle bundles and
+    then standalone summarizers are unloaded while the process is over budget,
+    and a CPU model that would not fit in what is left is loaded one size smaller.
+    """
+
+    def __init__(self, max_models=None, rss_budget_mb=None):
+        if max_models is None:
+            max_models = int(os.getenv("MODEL_REGISTRY_MAX_MODELS", 2))
+        if rss_budget_mb is None:
+            rss_budget_mb = int(os.getenv("WORKER_RSS_BUDGET_MB", 0))
+        self.max_models = max(1, max_models)
+        self.rss_budget_mb = rss_budget_mb
+        self._leases = Counter()
+        self._bundles = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._summarizers = {}
+        self._summarizer_lock = threading.Lock()
+
+    def get(self, model_size="base", summarizer_model=DEFAULT_SUMMARIZER, device=None, backend=DEFAULT_BACKEND):
+        """Return the bundle for the given key, loading it on first use."""
+        key = (model_size, summarizer_model, device or detect_device(), backend)
+
+        with self._lock:
+            if key in self._bundles:
+                self._bundles.move_to_end(key)
+                return self._bundles[key]
+
+        if self.rss_budget_mb and key[2] == "cpu":
+            self.enforce_budget()
+            fitted = self._fit_model_size(model_size, summarizer_model is not None)
+            if fitted != model_size:
+                logging.warning(f"Whisper '{model_size}' does not fit the {self.rss_budget_mb} MB RSS budget, "
+                                f"loading '{fitted}' instead")
+                key = (fitted,) + key[1:]
+
+        with self._lock:
+            if key in self._bundles:
+                self._bundles.move_to_end(key)
+                return self._bundles[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so other keys stay available,
+        # but make concurrent callers for the same key wait for one load.
+        with key_lock:
+            with self._lock:
+                if key in self._bundles:
+                    self._bundles.move_to_end(key)
+                    return self._bundles[key]
+
+            bundle = ModelBundle(*key)
+
+            with self._lock:
+                self._bundles[key] = bundle
+                self._bundles.move_to_end(key)
+                idle = [other for other in self._bundles if other != key and not self._leases[other]]
+                for evicted_key in idle[:max(0, len(self._bundles) - self.max_models)]:
+                    self._bundles.pop(evicted_key)
+                    self._key_locks.pop(evicted_key, None)
+                    logging.info(f"Evicted models from registry: {evicted_key}")
+                if len(self._bundles) > self.max_models:
+                    logging.warning(f"{len(self._bundles)} model bundles resident, more than {self.max_models}, "
+                                    "because the others are in use")
+                _empty_cuda_cache()
+            return bundle
+
+    def acquire(self, model_size="base", summarizer_model=DEFAULT_SUMMARIZER, device=None, backend=DEFAULT_BACKEND):
+        """Like get, but the bundle counts as in use, and is never unloaded for the budget, until release()."""
+        bundle = self.get(model_size, summarizer_model, device, backend)
+        with self._lock:
+            self._leases[bundle.key] += 1
+        return bundle
+
+    def release(self, bundle):
+        with self._lock:
+            self._leases[bundle.key] -= 1
+            if self._leases[bundle.key] <= 0:
+                del self._leases[bundle.key]
+        self.enforce_budget()
+
+    def enforce_budget(self):
+        """
+        Unload idle bundles, least recently used first, then summarizers loaded
+        by get_summarizer, while RSS is over the budget.
+        """
+        if not self.rss_budget_mb:
+            return
+        while current_rss_bytes() / (1024 * 1024) > self.rss_budget_mb:
+            with self._lock:
+                idle = [key for key in self._bundles if not self._leases[key]]
+                if idle:
+                    self._bundles.pop(idle[0])
+                    self._key_locks.pop(idle[0], None)
+                    unloaded = idle[0]
+            if not idle:
+                with self._summarizer_lock:
+                    if not self._summarizers:
+                        break
+                    unloaded = next(iter(self._summarizers))
+                    del self._summarizers[unloaded]
+            logging.info(f"Unloaded idle models over the RSS budget: {unloaded}")
+            release_memory()
+
+    def _fit_model_size(self, model_size, with_summarizer):
+        """Largest size, no bigger than `model_size`, whose expected RSS fits under the budget."""
+        from scripts.resources import WHISPER_PROFILES, MODEL_ORDER, SUMMARIZER_RAM_MB
+
+        if model_size not in WHISPER_PROFILES:
+            return model_size
+        headroom = self.rss_budget_mb - current_rss_bytes() / (1024 * 1024)
+        extra = SUMMARIZER_RAM_MB if with_summarizer else 0
+        for size in MODEL_ORDER[MODEL_ORDER.index(model_size):]:
+            if WHISPER_PROFILES[size]["ram_mb"] + extra <= headroom:
+                return size
+        return MODEL_ORDER[-1]
+
+    def get_summarizer(self, summarizer_model=DEFAULT_SUMMARIZER):
+        """
+        Summarization pipeline for jobs that do not need Whisper (e.g. captions):
+        taken from a loaded bundle if there is one, otherwise loaded on its own once.
+        """
+        with self._lock:
+            for bundle in reversed(self._bundles.values()):
+                if bundle.summarizer is not None and bundle.summarizer_model == summarizer_model:
+                    return bundle.summarizer
+        with self._summarizer_lock:
+            loaded = summarizer_model in self._summarizers
+        if not loaded:
+            self.enforce_budget()
+        with self._summarizer_lock:
+            if summarizer_model not in self._summarizers:
+                device_id = 0 if detect_device() == "cuda" else -1
+                self._summarizers[summarizer_model], _ = load_summarizer(summarizer_model, device_id)
+            return self._summarizers[summarizer_model]
+
+    def warm_up(self, configs):
+        """Preload a list of (model_size[, summarizer_model[, device[, backend]]]) tuples."""
+        for config in configs:
+            self.get(*config)
+
+    def evict(self, model_size, summarizer_model=DEFAULT_SUMMARIZER, device=None, backend=DEFAULT_BACKEND):
+        """Drop a bundle unless a transcriber still holds it; returns whether it was removed."""
+        key = (model_size, summarizer_model, device or detect_device(), backend)
+        with self._lock:
+            if self._leases[key]:
+                logging.info(f"Not evicting models in use: {key}")
+                return False
+            removed = self._bundles.pop(key, None)
+            self._key_locks.pop(key, None)
+        return removed is not None
+
+    def clear(self):
+        with self._lock:
+            self._bundles.clear()
+            self._key_locks.clear()
+            self._leases.clear()
+        with self._summarizer_lock:
+            self._summarizers.clear()
+
+    def loaded_keys(self):
+        with self._lock:
+            return list(self._bundles.keys())
+
+
+def _empty_cuda_cache():
+    import torch
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+model_registry = ModelRegistry()
+
+
+# Whisper model owned by a chunk worker process (see transcribe_segmented)
+_chunk_model = None
+
+
+def _init_chunk_worker(model_size, device, num_threads, backend):
+    global _chunk_model
+    import torch
+
+    # Split the cores between workers instead of letting each one use all of them
+    torch.set_num_threads(num_threads)
+    _chunk_model = load_backend(backend, model_size, device)
+
+
+def timed_segments(result, offset=0.0, word_timestamps=False):
+    """Segments of a whisper-style result as plain dicts, shifted by `offset` seconds."""
+    segments = []
+    for segment in result["segments"]:
+        item = {
+            "start": round(offset + segment["start"], 2),
+            "end": round(offset + segment["end"], 2),
+            "text": segment["text"],
+        }
+        if word_timestamps and segment.get("words"):
+            item["words"] = [{
+                "word": word["word"],
+                "start": round(offset + word["start"], 2),
+                "end": round(offset + word["end"], 2),
+                "probability": round(word["probability"], 3),
+            } for word in segment["words"]]
+        segments.append(item)
+    return segments
+
+
+def _transcribe_chunk(audio_chunk, language, word_timestamps=False):
+    kwargs = {"word_timestamps": True} if word_timestamps else {}
+    return timed_segments(_chunk_model.transcribe(audio_chunk, language=language, **kwargs), 0.0, word_timestamps)
+
+
+def default_chunk_workers(threads=None):
+    threads = threads or os.cpu_count() or 2
+    return int(os.getenv("TRANSCRIBE_WORKERS", max(1, threads // 2)))
+
+
+def transcribe_segmented(audio_file, model_size="base", device="cpu", language="hi",
+                         workers=None, target_s=60, max_s=120, overlap_s=1.0, model=None,
+                         backend=DEFAULT_BACKEND, completed=None, on_chunk=None, word_timestamps=False,
+                         return_segments=False, threads=None):
+    """
+    Transcribe long audio by splitting it at silences and decoding the chunks
+    in parallel, one Whisper model per worker process. The job's `threads`
+    (by default the torch thread count set from its JobPlan) are split
+    between the workers. Chunk texts are stitched
+    back in order with the overlapping words removed; with `return_segments`
+    the timed segments are returned instead, de-duplicated by time.
+    If `workers` is 1, chunks are decoded in this process with `model`.
+    Chunks whose index is in `completed` ({index: segments}) are not decoded again;
+    `on_chunk(index, start_s, end_s, segments)` is called as each new chunk finishes.
+    """
+    if threads is None:
+        import torch
+        threads = torch.get_num_threads()
+    workers = workers or default_chunk_workers(threads)
+    audio = load_audio_array(audio_file)
+    chunks = split_on_silence(audio, target_s=target_s, max_s=max_s, overlap_s=overlap_s)
+    chunk_segments = dict(completed or {})
+    todo = [i for i in range(len(chunks)) if i not in chunk_segments]
+
+    def finished(index, segments):
+        start, end = chunks[index]
+        # Chunk-relative times to absolute ones
+        segments = timed_segments({"segments": segments}, start / SAMPLE_RATE, word_timestamps)
+        chunk_segments[index] = segments
+        if on_chunk is not None:
+            on_chunk(index, start / SAMPLE_RATE, end / SAMPLE_RATE, segments)
+
+    logging.info(f"Transcribing {len(todo)} of {len(chunks)} chunks with {workers} workers")
+    if workers == 1 or len(todo) <= 1:
+        if todo and model is None:
+            model = load_backend(backend, model_size, device)
+        kwargs = {"word_timestamps": True} if word_timestamps else {}
+        for i in todo:
+            start, end = chunks[i]
+            finished(i, timed_segments(model.transcribe(audio[start:end], language=language, **kwargs),
+                                       0.0, word_timestamps))
+    else:
+        workers = min(workers, len(todo))
+        num_threads = max(1, threads // workers)
+        pieces = [audio[chunks[i][0]:chunks[i][1]] for i in todo]
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_chunk_worker,
+            initargs=(model_size, device, num_threads, backend)
+        ) as pool:
+            # map yields in order as chunks finish, so each one is checkpointed right away
+            results = pool.map(_transcribe_chunk, pieces, [language] * len(pieces), [word_timestamps] * len(pieces))
+            for i, segments in zip(todo, results):
+                finished(i, segments)
+
+    ordered = [chunk_segments[i] for i in range(len(chunks))]
+    if return_segments:
+        return merge_chunk_segments(chunks, ordered)
+    return stitch_texts([" ".join(segment["text"] for segment in segments) for segments in ordered])
+
+
+def summarize_text(summarizer, text, language=None, chunk_tokens=None, overlap_tokens=32, batch_size=4):
+    """Summarize a transcript in `language`; empty if the summarizer does not cover the language."""
+    if language and not can_summarize(language):
+        logging.warning(f"The summarizer does not cover '{language}', skipping the summary.")
+        return ""
+
+    logging.info("Generating summary...")
+    print("🔁 Generating summary...")
+    with metrics.stage("summarize"):
+        summary = summarize_long(
+            summarizer, text,
+            chunk_tokens=chunk_tokens,
+            overlap_tokens=overlap_tokens,
+            batch_size=batch_size,
+            max_length=100, min_length=30
+        )
+
+    logging.info("Summary generation complete.")
+    print("✅ Summary generation complete.")
+    return summary
+
+
+def _summarize_job(summarizer_model, text, language, chunk_tokens, overlap_tokens, batch_size):
+    summarizer, _ = load_summarizer(summarizer_model, 0 if detect_device() == "cuda" else -1)
+    return summarize_text(summarizer, text, language, chunk_tokens, overlap_tokens, batch_size)
+
+
+def summarize_in_subprocess(summarizer_model, text, language=None, chunk_tokens=None, overlap_tokens=32,
+                            batch_size=4):
+    """
+    Summarize in a spawned process that exits afterwards, so the summarizer's
+    memory goes back to the OS after every job at the cost of loading it each time.
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(
+            _summarize_job, summarizer_model, text, language, chunk_tokens, overlap_tokens, batch_size
+        ).result()
+
+
+class HindiTranscriber:
+    def __init__(self, audio_file=None, model_size="base", summarizer_model=DEFAULT_SUMMARIZER,
+                 device=None, registry=None, summary_chunk_tokens=None, summary_overlap_tokens=32,
+                 summary_batch_size=4, backend=DEFAULT_BACKEND, language=None, summarize_in_subprocess=None,
+                 word_timestamps=None, speculative_summary=None):
+        check_ffmpeg()
+
+        self.model_size = model_size
+        self.summarizer_model = summarizer_model
+        self.backend = backend
+        self.file_path = audio_file
+        self.registry = registry or model_registry
+        self.summary_chunk_tokens = summary_chunk_tokens
+        self.summary_overlap_tokens = summary_overlap_tokens
+        self.summary_batch_size = summary_batch_size
+        # None means the language is detected per file (see detect_language)
+        self.requested_language = language or requested_language()
+        self.language = self.requested_language
+        self.language_info = None
+        self.summarize_in_subprocess = (SUMMARIZE_IN_SUBPROCESS if summarize_in_subprocess is None
+                                        else summarize_in_subprocess)
+        self.word_timestamps = WORD_TIMESTAMPS if word_timestamps is None else word_timestamps
+        self.speculative_summary = SPECULATIVE_SUMMARY if speculative_summary is None else speculative_summary
+        # Normalized timed segments of the last transcription
+        self.segments = None
+
+        # Models are shared through the registry instead of being owned by the transcriber;
+        # they stay leased until close()
+        with metrics.stage("model_load", model_size=model_size):
+            bundle = self.registry.acquire(
+                model_size, None if self.summarize_in_subprocess else summarizer_model, device, backend
             )
-        except Exception as e:
-            if self.device_id == 0:
-                logging.warning("Retrying summarizer on CPU...")
-                try:
-                    self.summarizer = pipeline(
-                        "summarization",
-                        model=summarizer_model,
-                        tokenizer=summarizer_model,
-                        device=-1
-                    )
-                    logging.info("Summarizer loaded on CPU.")
-                except Exception as ex:
-                    logging.error(f"Summarization model failed on both GPU and CPU: {ex}")
-                    raise MyException(str(ex), sys)
-            else:
-                logging.error(f"Failed to load summarization model: {e}")
-                raise MyException(str(e), sys)
+        self._bundle = bundle
+        # The registry may load a smaller model to stay within its RSS budget
+        self.model_size = bundle.model_size
+        self.device = bundle.device
+        self.device_id = bundle.device_id
+        self.model = bundle.model
+        self.summarizer = bundle.summarizer
+
+        self._log_gpu_memory_info()
+
+    def close(self):
+        """Drop this transcriber's references to the shared models so idle ones can be unloaded."""
+        if self._bundle is None:
+            return
+        self.model = None
+        self.summarizer = None
+        bundle, self._bundle = self._bundle, None
+        self.registry.release(bundle)
+
+    def __enter__(self):
+        return self
 
-        logging.info("Summarization model loaded successfully.")
-        print("✅ Summarization model loaded.")
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
     def get_free_gpu_memory(self):
-        try:
-            result = subprocess.run(
-                ["nvidia-smi", "--query-gpu=memory.free", "--format=csv,nounits,noheader"],
-                stdout=subprocess.PIPE, text=True
-            )
-            mem = int(result.stdout.strip().split('\n')[0])
-            return mem
-        except Exception as e:
-            logging.warning("Unable to get GPU memory info. Assuming low memory.")
-            return -1
+        return get_free_gpu_memory()
+
+    def model_config(self):
+        """Model settings stored alongside each transcript."""
+        return {
+            "model_size": self.model_size,
+            "backend": self.backend,
+            "summarizer": self.summarizer_model,
+            "device": self.device,
+            "language": self.language or "auto",
+            "language_detection": self.language_info,
+        }
+
+    def detect_language(self, audio):
+        """
+        Route a file to a language: the requested one if set, otherwise Whisper's
+        detection on the first windows of the decoded samples, timed as its own stage.
+        """
+        if self.requested_language:
+            self.language = self.requested_language
+            return self.language
+
+        start = time.perf_counter()
+        with metrics.stage("detect_language", model_size=self.model_size):
+            probs = self.model.detect_language(audio, windows=LANGUAGE_DETECT_WINDOWS)
+        language, prob = choose_language(probs)
+        self.language = language
+        self.language_info = {
+            "language": language,
+            "probability": round(prob, 3),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        logging.info(f"Detected language: {self.language_info}")
+        return language
 
     def _log_gpu_memory_info(self):
         if self.device == "cuda":
+            import torch
             try:
                 total = torch.cuda.get_device_properties(0).total_memory // (1024 ** 2)
                 allocated = torch.cuda.memory_allocated(0) // (1024 ** 2)
                 logging.info(f"GPU memory: Total = {total} MB, Allocated = {allocated} MB")
             except Exception as e:
                 logging.warning(f"Failed to log GPU memory info: {e}")
-    def process_audio(self, output_dir):
+
+    def iter_segments(self, audio_file=None, window_s=30, language=None):
+        """
+        Yield normalized segments as {"start", "end", "text"} dicts while the
+        audio is decoded window by window, so callers see text long before the
+        whole file is finished. Windows are cut at silences near `window_s`.
+        """
+        audio_file = self.file_path if audio_file is None else audio_file
+        if audio_file is None:
+            raise MyException("No audio file provided for transcription.", sys)
+
         try:
-            ensure_directory_exists(output_dir)
+            audio = load_audio_array(audio_file)
+            language = language or self.detect_language(audio)
+            windows = split_on_silence(audio, target_s=window_s, max_s=window_s * 2, overlap_s=0)
+        except Exception as e:
+            logging.error(f"Error preparing audio for streaming: {e}")
+            raise MyException(str(e), sys)
 
-            logging.info(f"Transcribing audio file: {self.file_path}")
+        logging.info(f"Streaming transcription in {len(windows)} windows")
+        kwargs = {"word_timestamps": True} if self.word_timestamps else {}
+        for start, end in windows:
+            offset = start / SAMPLE_RATE
+            try:
+                result = self.model.transcribe(audio[start:end], language=language, **kwargs)
+            except Exception as e:
+                logging.error(f"Error transcribing window at {offset:.1f}s: {e}")
+                raise MyException(str(e), sys)
+
+            yield from clean_segments(timed_segments(result, offset, self.word_timestamps), lang=language)
+
+    def summarize(self, text):
+        if self.summarize_in_subprocess:
+            return summarize_in_subprocess(
+                self.summarizer_model, text, language=self.language,
+                chunk_tokens=self.summary_chunk_tokens,
+                overlap_tokens=self.summary_overlap_tokens,
+                batch_size=self.summary_batch_size
+            )
+        return summarize_text(
+            self.summarizer, text, language=self.language,
+            chunk_tokens=self.summary_chunk_tokens,
+            overlap_tokens=self.summary_overlap_tokens,
+            batch_size=self.summary_batch_size
+        )
+
+    def _streaming_summarizer(self, segmented):
+        """StreamingSummarizer for process_audio when SPECULATIVE_SUMMARY is on and it can run here."""
+        if not self.speculative_summary:
+            return None
+        if segmented or self.summarizer is None:
+            logging.info("Speculative summary needs sequential windows and an in-process summarizer; "
+                         "summarizing after transcription.")
+            return None
+        return StreamingSummarizer(
+            self.summarizer,
+            chunk_tokens=self.summary_chunk_tokens,
+            overlap_tokens=self.summary_overlap_tokens,
+            batch_size=self.summary_batch_size,
+            max_length=100, min_length=30
+        )
+
+    def _speculate(self, streaming):
+        if streaming is None:
+            return None
+
+        def on_text(text):
+            # The language is detected before the first window is decoded
+            if can_summarize(self.language):
+                streaming.feed(text)
+        return on_text
+
+    def _finish_summary(self, streaming, text):
+        # Only usable if it saw the whole transcript, not e.g. one read back from a checkpoint
+        if streaming is None or not streaming.texts or end_transcript(streaming.text, self.language) != text:
+            return self.summarize(text)
+
+        logging.info("Finishing speculative summary...")
+        print("🔁 Finishing summary...")
+        with metrics.stage("summarize", speculative=True):
+            summary = streaming.finish()
+        print("✅ Summary generation complete.")
+        return summary
+
+    def _transcript_key(self, fingerprint):
+        words = ":words" if self.word_timestamps else ""
+        return f"{fingerprint}:{self.model_size}:{self.backend}:{self.requested_language or 'auto'}{words}"
+
+    def transcribe_audio(self, output_dir, audio_file=None, segmented=False, workers=None, batched=False,
+                         checkpoint=None, on_text=None):
+        """
+        Transcribe and normalize an audio file path or a 16 kHz float32 array,
+        checkpointing every decoded window to `checkpoint` (by default one under
+        `output_dir` named after the audio content). A rerun resumes after the
+        last window on disk and skips decoding entirely once the transcript is saved.
+        Unless `segmented`, `on_text(text)` receives each window's normalized text
+        in order as soon as it is decoded; joined with spaces they form the transcript.
+        """
+        try:
+            audio_file = self.file_path if audio_file is None else audio_file
+            if audio_file is None:
+                raise ValueError("No audio file provided for transcription.")
+
+            ensure_directory_exists(output_dir)
+            fingerprint = audio_fingerprint(audio_file)
+            if checkpoint is None:
+                checkpoint = PipelineCheckpoint(fingerprint[:16], transcript_dir=output_dir)
+
+            key = self._transcript_key(fingerprint)
+            done = checkpoint.artifact("transcribe", key=key)
+            if done:
+                logging.info(f"Using checkpointed transcript: {checkpoint.transcript_path}")
+                self.language = done["model_config"]["language"]
+                self.language_info = done["model_config"]["language_detection"]
+                self.segments = checkpoint.read_segments()
+                return checkpoint.read_text(checkpoint.transcript_path)
+
+            # Decode once; Whisper receives samples instead of a path to decode again
+            with metrics.stage("decode"):
+                audio = load_audio_array(audio_file)
+
+            # Detected once from the samples already in memory
+            language = self.detect_language(audio)
+
+            logging.info(f"Transcribing audio: {len(audio) / SAMPLE_RATE:.1f}s ({language})")
             print("🔁 Transcribing audio...")
 
-            # Run the transcription
-            result = self.model.transcribe(self.file_path, language="hi")
+            # Window indices only map to the same audio spans under the same windowing
+            windowing = "segmented" if segmented else f"windows{CHECKPOINT_WINDOW_S}"
+            window_key = f"{key}:{windowing}"
+            done = checkpoint.load_windows(window_key)
+            checkpoint.begin("transcribe", model_size=self.model_size, backend=self.backend)
 
-            # Normalize text
-            text = result["text"]
-            normalizer = DevanagariNormalizer()
-            normalized_text = normalizer.normalize(text)
+            def save_window(i, start, end, window_segments):
+                checkpoint.record_window(window_key, i, start, end, window_segments, language)
+
+            # Run the transcription
+            with metrics.stage("transcribe", model_size=self.model_size, segmented=segmented):
+                if segmented:
+                    segments = transcribe_segmented(
+                        audio, model_size=self.model_size, device=self.device,
+                        language=language, workers=workers, model=self.model, backend=self.backend,
+                        completed={i: record["segments"] for i, record in done.items()},
+                        on_chunk=save_window,
+                        word_timestamps=self.word_timestamps, return_segments=True
+                    )
+                else:
+                    if batched:
+                        scheduler = get_batch_scheduler(
+                            self.model,
+                            max_batch_size=int(os.getenv("BATCH_MAX_SIZE", 8)),
+                            max_wait_s=float(os.getenv("BATCH_MAX_WAIT_MS", 50)) / 1000
+                        )
+                    # Decode in long windows cut at silences and checkpoint after each one
+                    windows = split_on_silence(
+                        audio, target_s=CHECKPOINT_WINDOW_S, max_s=CHECKPOINT_WINDOW_S * 1.2, overlap_s=0
+                    )
+                    if batched and self.word_timestamps:
+                        logging.warning("Batched decoding has no word timestamps; segments are per window.")
+                    kwargs = {"word_timestamps": True} if self.word_timestamps and not batched else {}
+                    segments = []
+                    for i, (start, end) in enumerate(windows):
+                        if i in done:
+                            window_segments = done[i]["segments"]
+                        else:
+                            if batched:
+                                result = scheduler.transcribe(audio[start:end], language=language)
+                            else:
+                                result = self.model.transcribe(audio[start:end], language=language, **kwargs)
+                            window_segments = timed_segments(result, start / SAMPLE_RATE, self.word_timestamps)
+                            save_window(i, start / SAMPLE_RATE, end / SAMPLE_RATE, window_segments)
+
+                        # Windows do not overlap, so each one is final and normalized right away
+                        with metrics.stage("normalize"):
+                            window_segments = list(clean_segments(window_segments, lang=language))
+                        segments.extend(window_segments)
+                        if on_text is not None:
+                            on_text(" ".join(segment["text"] for segment in window_segments))
+
+            # Chunks overlap until they are merged, so segmented output is normalized at the end
+            if segmented:
+                with metrics.stage("normalize"):
+                    segments = list(clean_segments(segments, lang=language))
+            normalized_text = end_transcript(" ".join(segment["text"] for segment in segments), language)
+
+            # Subtitles and segment JSON come from the same decode, streamed to disk
+            checkpoint.write_transcript(normalized_text)
+            output_paths = checkpoint.write_segments(segments, TRANSCRIPT_FORMATS)
+            checkpoint.complete(
+                "transcribe", key=key, files=[checkpoint.transcript_path] + output_paths,
+                model_config=self.model_config()
+            )
+            self.segments = segments
 
             logging.info("Transcription complete.")
             print("✅ Transcription complete.")
+            return normalized_text
 
-            logging.info("Generating summary...")
-            print("🔁 Generating summary...")
-            summary_result = self.summarizer(normalized_text, max_length=100, min_length=30, do_sample=False)
-            summary = summary_result[0]["summary_text"]
+        except Exception as e:
+            logging.error(f"Error in transcribe_audio: {e}")
+            raise MyException(str(e), sys)
 
-            logging.info("Summary generation complete.")
-            print("✅ Summary generation complete.")
+    def process_audio(self, output_dir, audio_file=None, segmented=False, workers=None, batched=False,
+                      checkpoint=None):
+        """
+        Transcribe and summarize an audio file path or a 16 kHz float32 array.
+        With `segmented=True` the audio is split at silences and decoded in
+        parallel across `workers` processes (see transcribe_segmented).
+        With `batched=True` its windows are decoded together with those of other
+        concurrent calls in this process (see scripts.batching.BatchScheduler).
+        Transcript windows and the summary are checkpointed (see transcribe_audio),
+        so a failed run resumes where it stopped.
+        With SPECULATIVE_SUMMARY=1 the summarizer works on finished windows in a
+        background thread while Whisper decodes (see StreamingSummarizer).
+        """
+        try:
+            audio_file = self.file_path if audio_file is None else audio_file
+            if audio_file is None:
+                raise ValueError("No audio file provided for transcription.")
+
+            # Same audio content with the same models gives the same result
+            fingerprint = audio_fingerprint(audio_file)
+            cache_key = f"transcript:{self._transcript_key(fingerprint)}:{self.summarizer_model}"
+            cached = result_cache.get_json(cache_key)
+            if cached:
+                logging.info("Using cached transcript and summary.")
+                self.language = cached.get("language", self.language)
+                self.segments = cached.get("segments")
+                return cached["transcript"], cached["summary"]
+
+            if checkpoint is None:
+                checkpoint = PipelineCheckpoint(fingerprint[:16], transcript_dir=output_dir)
+
+            streaming = self._streaming_summarizer(segmented)
+            try:
+                normalized_text = self.transcribe_audio(
+                    output_dir, audio_file, segmented=segmented, workers=workers, batched=batched,
+                    checkpoint=checkpoint, on_text=self._speculate(streaming)
+                )
+                summary = checkpoint.summarize_once(
+                    normalized_text, self.summarizer_model, lambda text: self._finish_summary(streaming, text)
+                )
+            finally:
+                if streaming is not None:
+                    streaming.close()
+            result_cache.put_json(cache_key, {
+                "transcript": normalized_text, "summary": summary, "language": self.language, "segments": self.segments
+            })
 
             return normalized_text, summary
 